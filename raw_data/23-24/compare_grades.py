@@ -5,100 +5,189 @@
 """
 
 import sys
+import os
+import re
+import json
+import hashlib
+import argparse
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
+# 共用的对账、统计模块位于仓库根目录的 scripts/ 下
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from reconcile import reconcile, describe_mismatch
+from fixed_point import to_hundredths
+from docx_table import iter_docx_rows, iter_docx_paragraphs, select_columns
+from instrumentation import instrument, log, record_rows
+
 try:
     import pdfplumber
 except ImportError:
     print("请安装pdfplumber: pip install pdfplumber")
     sys.exit(1)
 
-try:
-    from docx import Document
-except ImportError:
-    print("请安装python-docx: pip install python-docx")
-    sys.exit(1)
+# Word表格中读取的列：学号列、智育成绩列的表头名称
+WORD_COLUMNS = ('学号', '智育成绩')
 
-def extract_pdf_data(pdf_path):
-    """从PDF文件提取学号和智育成绩"""
-    print(f"正在读取PDF文件: {pdf_path}")
+# 页面解析逻辑变更时递增，使旧的页面缓存失效
+PDF_EXTRACT_VERSION = 2
+
+# 进程池中每个工作进程各自打开一次PDF
+_worker_pdf = None
+
+def _init_pdf_worker(pdf_path):
+    """进程池初始化：在工作进程中打开PDF"""
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(pdf_path)
+
+def _extract_page_in_worker(page_num):
+    """在工作进程中提取一页"""
+    return _extract_page_rows(_worker_pdf.pages[page_num], page_num)
+
+def _extract_page_rows(page, page_num):
+    """从单个PDF页面提取学号和智育成绩"""
+    rows = []
     
-    data = []
+    # 尝试提取表格
+    tables = page.extract_tables()
+    if tables:
+        for table in tables:
+            for row in table:
+                if row and len(row) >= 4:  # 至少需要4列
+                    # 跳过表头行
+                    if row[0] and str(row[0]).strip() and not str(row[0]).strip().startswith(('序号', '排名', '姓名', '学号')):
+                        student_id = str(row[0]).strip()
+                        # 第四列是智育成绩
+                        grade = str(row[3]).strip() if row[3] else ""
+                        rows.append({
+                            '学号': student_id,
+                            '智育成绩': grade,
+                            '页面': page_num + 1
+                        })
+    
+    # 如果没有找到表格，尝试文本提取
+    if not tables:
+        text = page.extract_text()
+        if text:
+            for line in text.split('\n'):
+                # 简单的正则匹配学号模式 (通常是数字)
+                parts = re.split(r'\s+', line.strip())
+                if len(parts) >= 4 and parts[0].isdigit():
+                    rows.append({
+                        '学号': parts[0],
+                        '智育成绩': parts[3],
+                        '页面': page_num + 1
+                    })
+    
+    return rows
+
+def _file_sha256(path):
+    """计算文件内容的SHA-256，用作页面缓存的键"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def iter_pdf_records(pdf_path, workers=None, cache_dir=None):
+    """
+    按页面顺序逐条产出PDF中的学号和智育成绩记录
+
+    workers 大于1时使用进程池并行提取页面；cache_dir 不为 None 时按
+    (文件哈希, 页码) 缓存每页的结果，PDF未变化时重复运行直接读取缓存。
+    """
     with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            print(f"处理PDF第{page_num + 1}页")
-            
-            # 尝试提取表格
-            tables = page.extract_tables()
-            if tables:
-                for table in tables:
-                    for row in table:
-                        if row and len(row) >= 4:  # 至少需要4列
-                            # 跳过表头行
-                            if row[0] and str(row[0]).strip() and not str(row[0]).strip().startswith(('序号', '排名', '姓名')):
-                                student_id = str(row[0]).strip()
-                                # 第四列是智育成绩
-                                if len(row) > 3:
-                                    grade = str(row[3]).strip() if row[3] else ""
-                                    data.append({
-                                        '学号': student_id,
-                                        '智育成绩': grade,
-                                        '页面': page_num + 1
-                                    })
-            
-            # 如果没有找到表格，尝试文本提取
-            if not tables:
-                text = page.extract_text()
-                if text:
-                    lines = text.split('\n')
-                    for line in lines:
-                        # 简单的正则匹配学号模式 (通常是数字)
-                        import re
-                        parts = re.split(r'\s+', line.strip())
-                        if len(parts) >= 4 and parts[0].isdigit():
-                            data.append({
-                                '学号': parts[0],
-                                '智育成绩': parts[3],
-                                '页面': page_num + 1
-                            })
-    
-    print(f"从PDF提取了 {len(data)} 条记录")
+        page_count = len(pdf.pages)
+    
+    page_cache = None
+    if cache_dir is not None:
+        page_cache = Path(cache_dir) / f"{_file_sha256(pdf_path)}-v{PDF_EXTRACT_VERSION}"
+        page_cache.mkdir(parents=True, exist_ok=True)
+    
+    def cache_file(page_num):
+        return page_cache / f"{page_num + 1}.json"
+    
+    missing_pages = [
+        page_num for page_num in range(page_count)
+        if page_cache is None or not cache_file(page_num).exists()
+    ]
+    if len(missing_pages) < page_count:
+        log(f"PDF页面缓存命中 {page_count - len(missing_pages)}/{page_count} 页")
+    
+    executor = None
+    if workers and workers > 1 and len(missing_pages) > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_worker,
+                                       initargs=(str(pdf_path),))
+        extracted = executor.map(_extract_page_in_worker, missing_pages)
+    else:
+        pdf = pdfplumber.open(pdf_path)
+        extracted = (_extract_page_rows(pdf.pages[page_num], page_num) for page_num in missing_pages)
+    
+    try:
+        # executor.map 按提交顺序返回结果，与缓存页交错后仍保持页面顺序
+        missing = set(missing_pages)
+        for page_num in range(page_count):
+            if page_num in missing:
+                log(f"处理PDF第{page_num + 1}页")
+                rows = next(extracted)
+                if page_cache is not None:
+                    tmp_file = cache_file(page_num).with_suffix('.tmp')
+                    tmp_file.write_text(json.dumps(rows, ensure_ascii=False), encoding='utf-8')
+                    os.replace(tmp_file, cache_file(page_num))
+            else:
+                rows = json.loads(cache_file(page_num).read_text(encoding='utf-8'))
+            yield from rows
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        else:
+            pdf.close()
+
+@instrument
+def extract_pdf_data(pdf_path, workers=None, cache_dir=None):
+    """从PDF文件提取学号和智育成绩"""
+    log(f"正在读取PDF文件: {pdf_path}")
+    
+    data = list(iter_pdf_records(pdf_path, workers=workers, cache_dir=cache_dir))
+    
+    record_rows(rows_out=len(data))
+    log(f"从PDF提取了 {len(data)} 条记录")
     return data
 
-def extract_word_data(docx_path):
-    """从Word文档提取学号和智育成绩"""
-    print(f"正在读取Word文档: {docx_path}")
+@instrument
+def extract_word_data(docx_path, columns=WORD_COLUMNS):
+    """
+    从Word文档提取学号和智育成绩
+
+    直接流式读取文档中的表格行，按表头名称选取 columns 指定的学号列和成绩列，
+    表头行本身不计入结果。
+    """
+    log(f"正在读取Word文档: {docx_path}")
     
     data = []
-    doc = Document(docx_path)
+    current_table = None
     
     # 从表格中提取数据
-    for table_idx, table in enumerate(doc.tables):
-        print(f"处理Word表格 {table_idx + 1}")
-        for row_idx, row in enumerate(table.rows):
-            cells = [cell.text.strip() for cell in row.cells]
-            if len(cells) >= 4:
-                # 跳过表头
-                if cells[0] and not cells[0].startswith(('序号', '排名', '姓名')):
-                    student_id = cells[0]
-                    grade = cells[3] if len(cells) > 3 else ""
-                    
-                    data.append({
-                        '学号': student_id,
-                        '智育成绩': grade,
-                        '表格': table_idx + 1,
-                        '行': row_idx + 1
-                    })
+    for table_idx, row_idx, (student_id, grade) in select_columns(iter_docx_rows(docx_path), columns):
+        if table_idx != current_table:
+            log(f"处理Word表格 {table_idx + 1}")
+            current_table = table_idx
+        if student_id:
+            data.append({
+                '学号': student_id,
+                '智育成绩': grade,
+                '表格': table_idx + 1,
+                '行': row_idx + 1
+            })
     
     # 如果没有表格或表格为空，尝试从段落中提取
     if not data:
-        for para_idx, paragraph in enumerate(doc.paragraphs):
-            text = paragraph.text.strip()
+        for para_idx, text in enumerate(iter_docx_paragraphs(docx_path)):
+            text = text.strip()
             if text:
-                import re
                 parts = re.split(r'\s+', text)
                 if len(parts) >= 4 and parts[0].isdigit():
                     data.append({
@@ -107,84 +196,76 @@ def extract_word_data(docx_path):
                         '段落': para_idx + 1
                     })
     
-    print(f"从Word提取了 {len(data)} 条记录")
+    record_rows(rows_out=len(data))
+    log(f"从Word提取了 {len(data)} 条记录")
     return data
 
+@instrument
 def compare_data(pdf_data, word_data):
     """比对PDF和Word数据"""
-    print("\n开始比对数据...")
+    log("\n开始比对数据...")
     
-    # 转换为DataFrame便于比较
-    pdf_df = pd.DataFrame(pdf_data)
-    word_df = pd.DataFrame(word_data)
+    log(f"PDF数据行数: {len(pdf_data)}")
+    log(f"Word数据行数: {len(word_data)}")
     
-    print(f"PDF数据行数: {len(pdf_df)}")
-    print(f"Word数据行数: {len(word_df)}")
-    
-    if len(pdf_df) == 0:
-        print("❌ PDF数据为空!")
+    if len(pdf_data) == 0:
+        log("❌ PDF数据为空!")
         return False
     
-    if len(word_df) == 0:
-        print("❌ Word数据为空!")
+    if len(word_data) == 0:
+        log("❌ Word数据为空!")
         return False
     
-    # 按学号排序
-    pdf_df = pdf_df.sort_values('学号').reset_index(drop=True)
-    word_df = word_df.sort_values('学号').reset_index(drop=True)
+    # 按学号哈希连接，一次遍历完成比对（成绩按百分之一分的整数精确比较，85.5 与 85.50 视为相同）
+    result = reconcile(pdf_data, word_data, key='学号', value='智育成绩', normalize=to_hundredths)
     
-    # 找出不匹配的记录
-    mismatches = []
-    all_student_ids = set(pdf_df['学号'].tolist() + word_df['学号'].tolist())
+    for side, duplicates in (('PDF', result['duplicates_left']), ('Word', result['duplicates_right'])):
+        if duplicates:
+            log(f"⚠️  {side}中有 {len(duplicates)} 个重复学号，比对时使用首次出现的记录")
     
-    for student_id in sorted(all_student_ids):
-        pdf_row = pdf_df[pdf_df['学号'] == student_id]
-        word_row = word_df[word_df['学号'] == student_id]
-        
-        if pdf_row.empty:
-            mismatches.append(f"学号 {student_id}: 在PDF中未找到")
-        elif word_row.empty:
-            mismatches.append(f"学号 {student_id}: 在Word中未找到")
-        else:
-            pdf_grade = pdf_row.iloc[0]['智育成绩']
-            word_grade = word_row.iloc[0]['智育成绩']
-            
-            if str(pdf_grade) != str(word_grade):
-                mismatches.append(f"学号 {student_id}: 智育成绩不匹配 (PDF: {pdf_grade}, Word: {word_grade})")
+    record_rows(rows_in=len(pdf_data) + len(word_data), rows_out=len(result['mismatches']))
+    mismatches = [describe_mismatch(m, 'PDF', 'Word', '智育成绩') for m in result['mismatches']]
     
     # 输出结果
     if not mismatches:
-        print("✅ 所有数据完全一致!")
-        print(f"共比对了 {len(all_student_ids)} 个学生的记录")
+        log("✅ 所有数据完全一致!")
+        log(f"共比对了 {result['total']} 个学生的记录")
         return True
     else:
-        print(f"❌ 发现 {len(mismatches)} 处不匹配:")
+        log(f"❌ 发现 {len(mismatches)} 处不匹配:")
         for mismatch in mismatches[:20]:  # 只显示前20个不匹配项
-            print(f"  - {mismatch}")
+            log(f"  - {mismatch}")
         
         if len(mismatches) > 20:
-            print(f"  ... 还有 {len(mismatches) - 20} 个不匹配项")
+            log(f"  ... 还有 {len(mismatches) - 20} 个不匹配项")
         
         return False
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="比对PDF和Word文档中的学号和智育成绩")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="并行提取PDF页面的进程数，1 表示单进程")
+    parser.add_argument("--no-cache", action="store_true", help="不使用PDF页面缓存")
+    args = parser.parse_args()
+    
     current_dir = Path(__file__).parent
+    cache_dir = None if args.no_cache else current_dir / ".pdf_cache"
     
     pdf_file = current_dir / "计算机学院（国家示范性软件学院）本科2023级计算机类2023-2024学年综合成绩公示.pdf"
     word_file = current_dir / "计算机学院（国家示范性软件学院）本科2023级计算机类2023-2024学年综合成绩公示.docx"
     
     if not pdf_file.exists():
-        print(f"❌ PDF文件不存在: {pdf_file}")
+        log(f"❌ PDF文件不存在: {pdf_file}")
         return
     
     if not word_file.exists():
-        print(f"❌ Word文件不存在: {word_file}")
+        log(f"❌ Word文件不存在: {word_file}")
         return
     
     try:
         # 提取数据
-        pdf_data = extract_pdf_data(pdf_file)
+        pdf_data = extract_pdf_data(pdf_file, workers=args.workers, cache_dir=cache_dir)
         word_data = extract_word_data(word_file)
         
         # 比对数据
@@ -198,17 +279,17 @@ def main():
             # 保存提取的数据
             pdf_df.to_csv(current_dir / "pdf_extracted_data.csv", index=False, encoding='utf-8-sig')
             word_df.to_csv(current_dir / "word_extracted_data.csv", index=False, encoding='utf-8-sig')
-            print(f"\n📊 详细数据已保存到:")
-            print(f"  - pdf_extracted_data.csv")
-            print(f"  - word_extracted_data.csv")
+            log(f"\n📊 详细数据已保存到:")
+            log(f"  - pdf_extracted_data.csv")
+            log(f"  - word_extracted_data.csv")
         
         if is_match:
-            print("\n🎉 验证完成: PDF和Word文档数据完全一致!")
+            log("\n🎉 验证完成: PDF和Word文档数据完全一致!")
         else:
-            print("\n⚠️  验证完成: 发现数据不一致，请查看上面的详细信息")
+            log("\n⚠️  验证完成: 发现数据不一致，请查看上面的详细信息")
             
     except Exception as e:
-        print(f"❌ 发生错误: {str(e)}")
+        log(f"❌ 发生错误: {str(e)}")
         import traceback
         traceback.print_exc()
 
@@ -4,83 +4,70 @@
 将24-25排名.md中的Markdown表格数据转换为CSV格式
 """
 
+import sys
 import pandas as pd
-import re
 from pathlib import Path
 
-def convert_md_to_csv():
+# 共用的统计模块位于仓库根目录的 scripts/ 下
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from artifacts import write_table
+from fixed_point import to_score
+from md_table import iter_md_table, log_bad_rows
+from instrumentation import instrument, log, record_rows
+
+@instrument
+def convert_md_to_csv(input_file="24-25排名.md", output_file="24-25.csv"):
     """将Markdown表格转换为CSV"""
     
-    input_file = Path("24-25排名.md")
-    output_file = Path("24-25.csv")
+    input_file = Path(input_file)
+    output_file = Path(output_file)
     
     if not input_file.exists():
-        print(f"❌ 文件不存在: {input_file}")
+        log(f"❌ 文件不存在: {input_file}")
         return
     
-    print(f"正在读取文件: {input_file}")
-    
-    # 读取文件内容
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    log(f"正在读取文件: {input_file}")
     
-    # 解析数据
-    data = []
-    lines = content.strip().split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        
-        # 跳过空行和分隔线
-        if not line or line.startswith('|---') or '----' in line:
-            continue
-            
-        # 处理表格行
-        if line.startswith('|') and line.endswith('|'):
-            # 移除首尾的|，然后分割
-            cells = [cell.strip() for cell in line[1:-1].split('|')]
-            
-            # 确保有两列数据且不是表头
-            if len(cells) >= 2 and cells[0] != '学号' and cells[0] != '----------':
-                student_id = cells[0].strip()
-                score = cells[1].strip()
-                
-                # 验证学号格式（应该是数字）和成绩格式
-                if student_id and score and student_id.isdigit() and score.replace('.', '').replace('-', '').isdigit():
-                    data.append({
-                        '学号': student_id,
-                        '课程成绩': float(score)
-                    })
+    # 逐行解析表格，按表头名称取学号和课程成绩列（成绩解析为百分之一分的整数，写出时转回两位小数）
+    errors = []
+    try:
+        data = [(record['学号'], to_score(record['课程成绩']))
+                for record in iter_md_table(input_file, errors=errors)]
+    except ValueError as e:
+        log(f"❌ {e}")
+        return
+    log_bad_rows(errors)
     
     if not data:
-        print("❌ 没有找到有效的数据")
+        log("❌ 没有找到有效的数据")
         return
     
     # 创建DataFrame
-    df = pd.DataFrame(data)
+    df = pd.DataFrame(data, columns=['学号', '课程成绩'])
     
     # 按学号排序
     df = df.sort_values('学号').reset_index(drop=True)
+    record_rows(rows_in=len(data) + len(errors), rows_out=len(df))
     
-    # 保存为CSV
-    df.to_csv(output_file, index=False, encoding='utf-8-sig')
+    # 保存为CSV（输出路径为 .feather/.parquet 时保存为列式文件）
+    write_table(df, output_file)
     
-    print(f"✅ 转换完成!")
-    print(f"共提取了 {len(df)} 条记录")
-    print(f"保存到文件: {output_file}")
+    log(f"✅ 转换完成!")
+    log(f"共提取了 {len(df)} 条记录")
+    log(f"保存到文件: {output_file}")
     
     # 显示数据预览
-    print(f"\n📋 数据预览:")
-    print("前5行:")
-    print(df.head().to_string(index=False))
-    print("\n后5行:")
-    print(df.tail().to_string(index=False))
+    log(f"\n📋 数据预览:")
+    log("前5行:")
+    log(df.head().to_string(index=False))
+    log("\n后5行:")
+    log(df.tail().to_string(index=False))
     
     # 统计信息
-    print(f"\n📊 统计信息:")
-    print(f"最高分: {df['课程成绩'].max()}")
-    print(f"最低分: {df['课程成绩'].min()}")
-    print(f"平均分: {df['课程成绩'].mean():.2f}")
+    log(f"\n📊 统计信息:")
+    log(f"最高分: {df['课程成绩'].max()}")
+    log(f"最低分: {df['课程成绩'].min()}")
+    log(f"平均分: {df['课程成绩'].mean():.2f}")
     
     return df
 
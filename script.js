@@ -1,6 +1,14 @@
-// 学生数据存储
+// 学生数据存储（已加载分片中的记录）
 let studentsData = {};
 
+// 发布包配置（scripts/publish.py 生成，分片文件名带内容哈希，可长期缓存）
+const BUNDLE_BASE = 'data/bundle/';
+let shardManifest = null;
+const loadedShards = new Set();
+
+// 分数-排名索引（升序排列的加权平均分，单位为百分之一分）
+let rankIndex = null;
+
 // 背景图片配置
 const backgroundConfig = {
     images: [
@@ -21,21 +29,106 @@ document.addEventListener('DOMContentLoaded', function() {
     preloadBackgroundImages();
 });
 
-// 加载学生数据
+// 加载发布包清单（学生数据按学号前缀分片，查询时按需加载）
 async function loadData() {
     try {
-        const response = await fetch('data.json');
+        // 清单文件名固定，每次都向服务器确认是否有更新
+        const response = await fetch(`${BUNDLE_BASE}bundle.json`, { cache: 'no-cache' });
         if (!response.ok) {
             throw new Error('数据加载失败');
         }
-        studentsData = await response.json();
-        console.log('数据加载成功，共', Object.keys(studentsData).length, '名学生');
+        shardManifest = await response.json();
+        updateStudentCount(shardManifest.total);
+        console.log('分片清单加载成功，共', shardManifest.total, '名学生，', Object.keys(shardManifest.shards).length, '个分片');
     } catch (error) {
         console.error('数据加载错误:', error);
         showError('数据加载失败，请刷新页面重试');
     }
 }
 
+// 显示总人数
+function updateStudentCount(total) {
+    const studentCount = document.getElementById('studentCount');
+    if (studentCount) {
+        studentCount.textContent = `总人数，计科 ${total}人`;
+    }
+}
+
+// 学生所在排名分区的总人数，旧数据没有该字段时使用全体人数
+function rankTotal(studentData) {
+    return studentData.总人数 ?? (shardManifest ? shardManifest.total : '-');
+}
+
+// 学生的排名是否为分区内排名（分区总人数与全体人数不同）
+function isPartitioned(studentData) {
+    return shardManifest !== null && studentData.总人数 != null && studentData.总人数 !== shardManifest.total;
+}
+
+// 按学号查找学生数据，只下载学号所在的分片
+async function findStudent(studentId) {
+    if (!shardManifest) {
+        await loadData();
+        if (!shardManifest) {
+            throw new Error('分片清单未加载');
+        }
+    }
+
+    const prefix = studentId.slice(0, shardManifest.prefix_len);
+    const shard = shardManifest.shards[prefix];
+    if (!shard) {
+        return null;
+    }
+
+    if (!loadedShards.has(prefix)) {
+        const response = await fetch(`${BUNDLE_BASE}${shard.file}`);
+        if (!response.ok) {
+            throw new Error('分片加载失败');
+        }
+        Object.assign(studentsData, await response.json());
+        loadedShards.add(prefix);
+    }
+
+    return studentsData[studentId] || null;
+}
+
+// 加载分数-排名索引，失败时不影响查询
+async function loadRankIndex() {
+    if (rankIndex) {
+        return rankIndex;
+    }
+    if (!shardManifest) {
+        await loadData();
+    }
+    if (!shardManifest || !shardManifest.rank_index) {
+        return null;
+    }
+    try {
+        const response = await fetch(`${BUNDLE_BASE}${shardManifest.rank_index}`);
+        if (response.ok) {
+            rankIndex = await response.json();
+        }
+    } catch (error) {
+        console.error('排名索引加载错误:', error);
+    }
+    return rankIndex;
+}
+
+// 严格低于该分数的学生所占百分比（二分查找）
+function percentileForScore(index, score) {
+    const target = Math.round(score * 100);
+    let low = 0;
+    let high = index.scores.length;
+    while (low < high) {
+        const middle = (low + high) >> 1;
+        if (index.scores[middle] < target) {
+            low = middle + 1;
+        } else {
+            high = middle;
+        }
+    }
+    return low / index.scores.length * 100;
+}
+
 // 初始化事件监听器
 function initializeEventListeners() {
     const studentIdInput = document.getElementById('studentId');
@@ -103,10 +196,13 @@ async function searchGrade() {
         await new Promise(resolve => setTimeout(resolve, 300));
 
         // 查找学生数据
-        const studentData = studentsData[studentId];
+        const studentData = await findStudent(studentId);
         
         if (studentData) {
-            displayResult(studentData);
+            // 排名索引按全体学生统计；分区排名时名次和总人数是分区内的，不再显示全体百分位以免互相矛盾
+            const index = isPartitioned(studentData) ? null : await loadRankIndex();
+            const percentile = index ? percentileForScore(index, studentData.加权平均分) : null;
+            displayResult(studentData, percentile);
             showResultSection(true);
         } else {
             showError('未找到该学号的成绩记录，请检查学号是否正确');
@@ -142,7 +238,7 @@ function validateInput(studentId) {
 }
 
 // 显示查询结果
-function displayResult(studentData) {
+function displayResult(studentData, percentile = null) {
     const resultContent = document.getElementById('resultContent');
     
     // 确定学生类型样式
@@ -166,7 +262,10 @@ function displayResult(studentData) {
             <div class="rank-display">
                 <div class="rank-number">${studentData.排名}</div>
                 <div class="rank-label">专业排名</div>
-                <div class="rank-total">/ 358人</div>
+                <div class="rank-total">/ ${rankTotal(studentData)}人</div>
+                ${percentile !== null ? `
+                <div class="rank-percentile">超过了 ${percentile.toFixed(1)}% 的同学</div>
+                ` : ''}
             </div>
             
             <div class="grades-container">
@@ -307,7 +406,7 @@ function shareResult(studentId) {
     if (!student) return;
     
     const shareText = `我在北邮计算机学院2023级智育成绩查询系统中查到了我的成绩：
-专业排名: ${student.排名}/358
+专业排名: ${student.排名}/${rankTotal(student)}
 加权平均分: ${student.加权平均分}
 学生类型: ${student.学生类型}学生`;
 
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中间产物的读写
+
+按文件后缀选择格式:
+    .feather / .arrow   Arrow IPC（不压缩，读取时内存映射），需要 pyarrow
+    .parquet            Parquet，需要 pyarrow
+    .csv                utf-8-sig 编码的CSV（供人查看）
+
+列式格式按 SCHEMAS 保存类型（学号为字符串、成绩为浮点数），读回后无需再做
+astype(str) / to_numeric 之类的转换；读取CSV时学号也固定按字符串解析。
+
+命令行导出CSV: python artifacts.py 输入.feather 输出.csv
+"""
+
+import sys
+import pandas as pd
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+COLUMNAR_SUFFIXES = ('.feather', '.arrow', '.parquet')
+
+# 各列的类型，出现在表中的列按此转换
+SCHEMAS = {
+    '学号': 'string',
+    '排名': 'int64',
+    '总人数': 'int64',
+    '智育成绩': 'float64',
+    '课程成绩': 'float64',
+    '大一成绩': 'float64',
+    '大二成绩': 'float64',
+    '加权平均分': 'float64',
+    '学生类型': 'string',
+}
+
+def columnar_available():
+    """是否安装了 pyarrow"""
+    return pa is not None
+
+def _require_pyarrow(path):
+    if pa is None:
+        raise ImportError(f"读写 {path} 需要pyarrow，请安装: pip install pyarrow")
+
+def _apply_schema(df):
+    """按 SCHEMAS 统一列类型（学号为Python字符串）"""
+    for column, dtype in SCHEMAS.items():
+        if column not in df.columns:
+            continue
+        if dtype == 'string':
+            df[column] = df[column].astype(object).where(df[column].notna(), None)
+            df[column] = df[column].map(lambda v: v if v is None else str(v))
+        elif dtype == 'int64':
+            df[column] = df[column].astype('int64')
+        else:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
+    return df
+
+def write_table(df, path, header=True):
+    """按后缀写出表格；header 只对CSV有效（23-24格式的CSV无表头）"""
+    path = Path(path)
+    if path.suffix in COLUMNAR_SUFFIXES:
+        _require_pyarrow(path)
+        df = _apply_schema(df.reset_index(drop=True).copy())
+        if path.suffix == '.parquet':
+            df.to_parquet(path, index=False)
+        else:
+            # 不压缩，读取时可以直接内存映射
+            feather.write_feather(df, path, compression='uncompressed')
+    else:
+        df.to_csv(path, index=False, header=header, encoding='utf-8-sig')
+    return path
+
+def read_table(path, names=None):
+    """
+    按后缀读取表格
+
+    names 用于无表头的CSV（如23-24.csv）；列式文件读取后按位置重命名为 names。
+    """
+    path = Path(path)
+    if path.suffix in COLUMNAR_SUFFIXES:
+        _require_pyarrow(path)
+        if path.suffix == '.parquet':
+            df = pd.read_parquet(path)
+        else:
+            df = feather.read_table(path, memory_map=True).to_pandas()
+        if names is not None:
+            df.columns = names
+        return df
+
+    if names is not None:
+        return pd.read_csv(path, header=None, names=names, dtype={'学号': str}, encoding='utf-8-sig')
+    return pd.read_csv(path, dtype={'学号': str}, encoding='utf-8-sig')
+
+def main():
+    if len(sys.argv) != 3:
+        print("用法: python artifacts.py <输入文件> <输出文件>")
+        return
+    df = read_table(sys.argv[1])
+    write_table(df, sys.argv[2])
+    print(f"✅ 已导出 {len(df)} 条记录到: {sys.argv[2]}")
+
+if __name__ == "__main__":
+    main()
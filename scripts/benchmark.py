@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+处理脚本的性能基准测试
+
+用 generate_cohort.py 生成不同规模的模拟数据，分别测量各阶段的耗时和峰值内存，
+结果写入JSON文件；指定 --compare 时与之前的结果对比，发现性能回退。
+
+用法:
+    python scripts/benchmark.py --sizes 1000,10000,100000 --output bench.json
+    python scripts/benchmark.py --output new.json --compare bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "raw_data" / "24-25"))
+
+import calculate_weighted_grades as weighted
+from convert_csv_to_json import convert_csv_to_json
+from convert_md_to_csv import convert_md_to_csv
+from compare_md_csv import extract_md_data
+from generate_cohort import write_cohort
+import instrumentation
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+def _quiet(func, *args, **kwargs):
+    """执行函数并屏蔽其打印输出"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+def measure(func, *args, repeat=1, memory=True, **kwargs):
+    """
+    测量函数的耗时和峰值内存
+
+    耗时取 repeat 次中的最小值；峰值内存在额外一次 tracemalloc 跟踪的运行中测得，
+    避免跟踪开销影响计时。返回 (函数结果, 指标字典)。
+    """
+    wall_times = []
+    cpu_times = []
+    result = None
+    for _ in range(repeat):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = _quiet(func, *args, **kwargs)
+        cpu_times.append(time.process_time() - cpu_start)
+        wall_times.append(time.perf_counter() - wall_start)
+
+    metrics = {
+        'wall_s': round(min(wall_times), 6),
+        'cpu_s': round(min(cpu_times), 6),
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            _quiet(func, *args, **kwargs)
+            metrics['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+        finally:
+            tracemalloc.stop()
+
+    return result, metrics
+
+def _word_extractor():
+    """按需导入Word/PDF解析（依赖 pdfplumber）"""
+    sys.path.insert(0, str(REPO_ROOT / "raw_data" / "23-24"))
+    import compare_grades
+    return compare_grades
+
+def benchmark_size(size, work_dir, repeat=1, memory=True, docx_max=10000, seed=0):
+    """对一个规模的模拟数据运行全部阶段，返回结果列表"""
+    work_dir = Path(work_dir)
+    files = _quiet(write_cohort, size, work_dir / "input", seed, size <= docx_max)
+    out_dir = work_dir / "output"
+    out_dir.mkdir(exist_ok=True)
+
+    results = []
+
+    def record(stage, func, *args, rows=None, **kwargs):
+        result, metrics = measure(func, *args, repeat=repeat, memory=memory, **kwargs)
+        entry = {'size': size, 'stage': stage, **metrics}
+        if rows is not None:
+            entry['rows'] = rows(result)
+        results.append(entry)
+        print(f"  {stage:<28} {metrics['wall_s']:>9.3f}s"
+              + (f" {metrics['peak_mb']:>9.1f}MB" if memory else ""))
+        return result
+
+    (df_year1, df_year2) = record('load_data', weighted.load_data, files['23-24'], files['24-25'],
+                                  rows=lambda r: len(r[0]) + len(r[1]))
+    df_results = record('calculate_weighted_grades', weighted.calculate_weighted_grades, df_year1, df_year2,
+                        rows=len)
+    ranking_file, simple_file = record('save_results', weighted.save_results, df_results,
+                                       out_dir / "加权成绩排名.csv", out_dir / "最终排名.csv")
+    record('convert_csv_to_json', convert_csv_to_json, ranking_file, out_dir / "data.json", out_dir / "shards",
+           rows=len)
+    record('convert_md_to_csv', convert_md_to_csv, files['md'], out_dir / "24-25.csv", rows=len)
+    record('extract_md_data', extract_md_data, files['md'], rows=len)
+    if 'docx' in files:
+        record('extract_word_data', _word_extractor().extract_word_data, files['docx'], rows=len)
+
+    return results
+
+def git_revision():
+    """当前提交的哈希，不在git仓库中时返回 None"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(current, baseline, threshold, min_delta=0.01):
+    """
+    对比两次结果，返回耗时增加超过 threshold（比例）的阶段列表
+
+    绝对增量小于 min_delta 秒的视为测量噪声，不计入回退。
+    """
+    previous = {(r['size'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for entry in current['results']:
+        old = previous.get((entry['size'], entry['stage']))
+        if not old or old['wall_s'] <= 0:
+            continue
+        change = entry['wall_s'] / old['wall_s'] - 1
+        if change > threshold and entry['wall_s'] - old['wall_s'] >= min_delta:
+            regressions.append((entry['size'], entry['stage'], old['wall_s'], entry['wall_s'], change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="处理脚本性能基准测试")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="逗号分隔的学生规模，如 1000,10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=1, help="每个阶段重复次数，取最短耗时")
+    parser.add_argument("--no-memory", action="store_true", help="不测量峰值内存")
+    parser.add_argument("--docx-max", type=int, default=10000, help="生成并测试Word表格的最大规模")
+    parser.add_argument("--pdf", default=None, help="额外测试PDF解析所用的公示PDF文件")
+    parser.add_argument("--output", default="bench_results.json", help="结果JSON文件")
+    parser.add_argument("--compare", default=None, help="与之前的结果JSON对比")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定回退的耗时增幅，默认20%%")
+    parser.add_argument("--min-delta", type=float, default=0.01, help="判定回退的最小耗时增量（秒）")
+    args = parser.parse_args()
+
+    # 基准测试自行计时和跟踪内存，关闭各阶段自带的统计
+    instrumentation.configure(mode='off')
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    memory = not args.no_memory
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': []
+    }
+
+    for size in sizes:
+        print(f"\n📏 规模: {size} 人")
+        with tempfile.TemporaryDirectory() as work_dir:
+            report['results'].extend(benchmark_size(size, work_dir, args.repeat, memory, args.docx_max))
+
+    if args.pdf:
+        print(f"\n📄 PDF: {args.pdf}")
+        data, metrics = measure(_word_extractor().extract_pdf_data, args.pdf, repeat=args.repeat, memory=memory)
+        report['results'].append({'size': len(data), 'stage': 'extract_pdf_data', **metrics, 'rows': len(data)})
+        print(f"  {'extract_pdf_data':<28} {metrics['wall_s']:>9.3f}s")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 基准测试结果已保存到: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n⚠️  发现 {len(regressions)} 处性能回退（阈值 {args.threshold:.0%}）:")
+            for size, stage, old, new, change in regressions:
+                print(f"  - {stage} @ {size}: {old:.3f}s → {new:.3f}s (+{change:.0%})")
+            sys.exit(1)
+        print(f"\n✅ 与 {args.compare} 相比没有性能回退")
+
+if __name__ == "__main__":
+    main()
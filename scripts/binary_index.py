@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定长二进制成绩索引
+
+按学号升序存放定长记录（学号、排名、成绩均为打包整数，成绩以百分之一分为单位），
+读取时内存映射文件并二分查找，无需解析整个文件，适合批量查询学号。
+
+文件格式（小端序）:
+    文件头: 魔数 b'BGRD' | 版本 uint16 | 记录长度 uint16 | 记录数 uint32
+    记录:   学号 uint64 | 排名 uint32 | 大一成绩 int32 | 大二成绩 int32 |
+            加权平均分 int32 | 学生类型 uint8 | 填充 3 字节
+缺失的成绩记为 MISSING_SCORE；学号须为不以0开头的纯数字，以便从整数无损还原。
+"""
+
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+from fixed_point import to_hundredths
+from instrumentation import instrument, log, record_rows
+
+MAGIC = b'BGRD'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+RECORD = struct.Struct('<QIiiiB3x')
+ID_FIELD = struct.Struct('<Q')
+
+MISSING_SCORE = -2**31
+
+STUDENT_TYPES = ['完整', '转入']
+
+def _pack_score(score):
+    """成绩转换为百分之一分的整数"""
+    if score is None:
+        return MISSING_SCORE
+    return to_hundredths(score)
+
+def _id_key(student_id):
+    """
+    学号转换为打包的整数，不能无损表示的学号返回 None
+
+    只接受不以0开头的纯数字学号（'0' 本身除外）：'0123' 打包后会变成 123，读出时无法还原。
+    """
+    if not (student_id.isascii() and student_id.isdigit()):
+        return None
+    if len(student_id) > 1 and student_id.startswith('0'):
+        return None
+    value = int(student_id)
+    return value if value < 2**64 else None
+
+def _unpack_score(value):
+    """百分之一分的整数还原为成绩"""
+    if value == MISSING_SCORE:
+        return None
+    return value / 100
+
+@instrument
+def write_binary_index(records, output_file):
+    """
+    将学生记录写入二进制索引文件
+
+    records 为 convert_csv_to_json 生成的记录字典（键同 data.json）的可迭代对象。
+    """
+    packed = []
+    for record in records:
+        student_id = str(record['学号'])
+        key = _id_key(student_id)
+        if key is None:
+            raise ValueError(f"学号不是纯数字或以0开头，无法写入二进制索引: {student_id}")
+        packed.append((
+            key,
+            int(record['排名']),
+            _pack_score(record['大一成绩']),
+            _pack_score(record['大二成绩']),
+            _pack_score(record['加权平均分']),
+            STUDENT_TYPES.index(record['学生类型'])
+        ))
+
+    packed.sort(key=lambda item: item[0])
+    record_rows(rows_in=len(packed), rows_out=len(packed))
+    for previous, current in zip(packed, packed[1:]):
+        if previous[0] == current[0]:
+            raise ValueError(f"学号重复，无法写入二进制索引: {current[0]}")
+
+    output_file = Path(output_file)
+    with open(output_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(packed)))
+        for item in packed:
+            f.write(RECORD.pack(*item))
+
+    log(f"✅ 二进制索引已保存到: {output_file} ({len(packed)} 条记录，每条 {RECORD.size} 字节)")
+
+    return output_file
+
+class BinaryIndex:
+    """内存映射的二进制成绩索引，按学号二分查找"""
+
+    def __init__(self, index_file):
+        self.path = Path(index_file)
+        self._file = open(self.path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"二进制索引文件为空: {self.path}")
+
+        magic, version, record_size, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"无法识别的二进制索引文件: {self.path}")
+        if len(self._mm) != HEADER.size + count * RECORD.size:
+            self.close()
+            raise ValueError(f"二进制索引文件长度不正确: {self.path}")
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """释放内存映射和文件句柄"""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def _id_at(self, position):
+        return ID_FIELD.unpack_from(self._mm, HEADER.size + position * RECORD.size)[0]
+
+    def _record_at(self, position):
+        student_id, rank, year1, year2, weighted, student_type = RECORD.unpack_from(
+            self._mm, HEADER.size + position * RECORD.size)
+        return {
+            "排名": rank,
+            "学号": str(student_id),
+            "大一成绩": _unpack_score(year1),
+            "大二成绩": _unpack_score(year2),
+            "加权平均分": _unpack_score(weighted),
+            "学生类型": STUDENT_TYPES[student_type]
+        }
+
+    def _search(self, target, low=0):
+        """返回第一个学号不小于 target 的位置"""
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._id_at(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, student_id):
+        """查询单个学号，未找到返回 None"""
+        target = _id_key(str(student_id).strip())
+        if target is None:
+            return None
+        position = self._search(target)
+        if position < self.count and self._id_at(position) == target:
+            return self._record_at(position)
+        return None
+
+    def lookup_many(self, student_ids):
+        """
+        批量查询学号，返回 {学号: 记录或None}
+
+        查询前先排序，每次二分查找从上一次的位置开始，减少比较次数。
+        """
+        results = {}
+        queries = []
+        for student_id in student_ids:
+            student_id = str(student_id).strip()
+            results[student_id] = None
+            target = _id_key(student_id)
+            if target is not None:
+                queries.append((target, student_id))
+
+        position = 0
+        for target, student_id in sorted(queries):
+            position = self._search(target, position)
+            if position < self.count and self._id_at(position) == target:
+                results[student_id] = self._record_at(position)
+
+        return results
+
+    def __iter__(self):
+        for position in range(self.count):
+            yield self._record_at(position)
+
+def main():
+    """命令行查询: python binary_index.py data.bin 学号 [学号 ...]"""
+    if len(sys.argv) < 3:
+        print("用法: python binary_index.py <索引文件> <学号> [学号 ...]")
+        return
+
+    with BinaryIndex(sys.argv[1]) as index:
+        for student_id, record in index.lookup_many(sys.argv[2:]).items():
+            if record is None:
+                print(f"❌ {student_id}: 未找到")
+            else:
+                print(f"✅ {student_id}: 排名 {record['排名']}/{len(index)}，加权平均分 {record['加权平均分']:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -5,154 +5,265 @@
 根据大一大二学期学分计算加权平均分并生成排名
 """
 
+import argparse
+import os
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-# 学分配置
-CREDITS = {
-    'year1': 51.8,  # 大一总学分 (25.4 + 26.4)
-    'year2': 48.3,  # 大二总学分 (24.9 + 23.4)
-    'total': 100.1  # 总学分
-}
+from artifacts import read_table, write_table
+from distribution import ScoreSketch
+from fixed_point import SCALE, credit_units, to_hundredths
+from grade_core import CREDITS, YEAR_CREDITS
+from instrumentation import instrument, log, record_rows
 
-def load_data():
+# 分区排名时，总行数达到该值才使用进程池
+PARALLEL_MIN_ROWS = 200_000
+
+@instrument
+def load_data(file_23_24="23-24.csv", file_24_25="24-25.csv"):
     """加载数据文件"""
-    print("📚 正在加载数据文件...")
+    log("📚 正在加载数据文件...")
     
     # 加载23-24成绩（大一）
-    file_23_24 = Path("23-24.csv")
+    file_23_24 = Path(file_23_24)
     if not file_23_24.exists():
-        print(f"❌ 文件不存在: {file_23_24}")
+        log(f"❌ 文件不存在: {file_23_24}")
         return None, None
     
-    # 读取大一成绩（无表头格式）
-    df_year1 = pd.read_csv(file_23_24, header=None, names=['学号', '大一成绩'])
+    # 读取大一成绩（CSV为无表头格式，学号按字符串读取）
+    df_year1 = read_table(file_23_24, names=['学号', '大一成绩'])
+    rows_in = len(df_year1)
     df_year1 = df_year1.dropna()
-    df_year1['学号'] = df_year1['学号'].astype(str)
     df_year1['大一成绩'] = pd.to_numeric(df_year1['大一成绩'], errors='coerce')
     
     # 加载24-25成绩（大二）
-    file_24_25 = Path("24-25.csv")
+    file_24_25 = Path(file_24_25)
     if not file_24_25.exists():
-        print(f"❌ 文件不存在: {file_24_25}")
+        log(f"❌ 文件不存在: {file_24_25}")
         return None, None
     
-    df_year2 = pd.read_csv(file_24_25, encoding='utf-8-sig')
+    df_year2 = read_table(file_24_25)
+    rows_in += len(df_year2)
     df_year2 = df_year2.dropna()
-    df_year2['学号'] = df_year2['学号'].astype(str)
     df_year2['大二成绩'] = pd.to_numeric(df_year2['课程成绩'], errors='coerce')
-    df_year2 = df_year2[['学号', '大二成绩']]
+    # 保留专业等其他列，供分区排名使用
+    df_year2 = df_year2[['学号', '大二成绩'] + [col for col in df_year2.columns
+                                             if col not in ('学号', '大二成绩', '课程成绩')]]
     
-    print(f"✅ 大一成绩数据: {len(df_year1)} 条记录")
-    print(f"✅ 大二成绩数据: {len(df_year2)} 条记录")
+    log(f"✅ 大一成绩数据: {len(df_year1)} 条记录")
+    log(f"✅ 大二成绩数据: {len(df_year2)} 条记录")
+    record_rows(rows_in=rows_in, rows_out=len(df_year1) + len(df_year2))
     
     return df_year1, df_year2
 
-def calculate_weighted_grades(df_year1, df_year2):
-    """计算学分加权成绩"""
-    print("\n🧮 正在计算学分加权成绩...")
-    
-    # 合并数据，使用外连接确保包含所有学生
-    df_merged = pd.merge(df_year2, df_year1, on='学号', how='left')
-    
-    # 分类学生
-    complete_students = df_merged[df_merged['大一成绩'].notna()]  # 有完整成绩的学生
-    transfer_students = df_merged[df_merged['大一成绩'].isna()]  # 转入学生（只有大二成绩）
-    
-    print(f"👥 完整成绩学生: {len(complete_students)} 人")
-    print(f"🔄 转入学生: {len(transfer_students)} 人")
-    
-    results = []
-    
-    # 计算完整学生的加权成绩
-    for _, student in complete_students.iterrows():
-        weighted_score = (
-            student['大一成绩'] * CREDITS['year1'] + 
-            student['大二成绩'] * CREDITS['year2']
-        ) / CREDITS['total']
-        
-        results.append({
-            '学号': student['学号'],
-            '大一成绩': student['大一成绩'],
-            '大二成绩': student['大二成绩'],
-            '加权平均分': round(weighted_score, 2),
-            '学生类型': '完整'
-        })
-    
-    # 处理转入学生（只有大二成绩）
-    for _, student in transfer_students.iterrows():
-        results.append({
-            '学号': student['学号'],
-            '大一成绩': None,
-            '大二成绩': student['大二成绩'],
-            '加权平均分': round(student['大二成绩'], 2),  # 转入学生直接用大二成绩
-            '学生类型': '转入'
-        })
-    
-    # 创建结果DataFrame
-    df_results = pd.DataFrame(results)
-    
-    # 按加权平均分降序排序
-    df_results = df_results.sort_values('加权平均分', ascending=False).reset_index(drop=True)
-    
-    # 添加排名
-    df_results['排名'] = range(1, len(df_results) + 1)
+def to_hundredths_array(scores):
+    """
+    浮点成绩矩阵转为百分之一分的 int64 矩阵（缺失处为0）
+
+    两位小数以内的成绩直接取整；其余少数元素逐个用 fixed_point.to_hundredths 转换，结果与之完全相同。
+    """
+    present = np.isfinite(scores)
+    filled = np.where(present, scores, 0.0)
+    hundredths = np.rint(filled * SCALE)
+    inexact = np.nonzero(hundredths / SCALE != filled)
+    hundredths = hundredths.astype(np.int64)
+    for index in zip(*inexact):
+        hundredths[index] = to_hundredths(float(scores[index]))
+    return hundredths
+
+def weighted_hundredths_array(hundredths, present, units):
+    """
+    加权平均分（百分之一分的浮点数矩阵，无法计算处为 NaN）
+
+    hundredths / present 为 学生×成绩列 矩阵，units 为 credit_units 的 成绩列×方案 矩阵；
+    整数精确计算并四舍五入，规则同 fixed_point.weighted_hundredths。
+    """
+    numerator = hundredths @ units
+    denominator = present.astype(np.int64) @ units
+    rounded = (2 * numerator + denominator) // np.maximum(2 * denominator, 1)
+    return np.where(denominator > 0, rounded, np.nan)
+
+def compute_weighted_scores(df, credits):
+    """
+    按学分向量计算加权平均分（向量化，支持任意多个学年/学期成绩列）
+
+    credits 为 {成绩列名: 学分} 的有序映射，df 中需包含这些列。
+    某列缺失（NaN）的学生只按其已有成绩的学分重新归一化，
+    例如转入学生只有大二成绩时，加权平均分即为大二成绩。
+    成绩和学分转为整数后精确计算（见 fixed_point），结果与 grade_core 完全一致。
+
+    返回 (加权平均分Series, 是否完整Series)
+    """
+    columns = list(credits)
+    scores = df[columns].to_numpy(dtype=float)
+    present = np.isfinite(scores)
+    units = np.array([[credit_units(credits[col])] for col in columns], dtype=np.int64)
+
+    weighted = weighted_hundredths_array(to_hundredths_array(scores), present, units)[:, 0] / SCALE
+
+    complete = present.all(axis=1)
+    return pd.Series(weighted, index=df.index), pd.Series(complete, index=df.index)
+
+def _rank_partitions(df, partition_by):
+    """
+    在每个分区内按加权平均分降序排名（分组向量化）
+
+    df 需已按分区内的原始顺序排列；同分学生保持原有先后（稳定排序）。
+    """
+    df = df.sort_values(partition_by + ['加权平均分'],
+                        ascending=[True] * len(partition_by) + [False],
+                        kind='stable').reset_index(drop=True)
+    groups = df.groupby(partition_by, sort=False, dropna=False)
+    df.insert(0, '排名', groups.cumcount().to_numpy() + 1)
+    df['总人数'] = groups['学号'].transform('size').to_numpy()
+    return df
+
+def rank_weighted_grades(df_merged, credits, partition_by=None, workers=None):
+    """
+    对合并后的成绩表计算加权平均分和排名
+
+    df_merged 每行一个学生，包含学号和 credits 中的各成绩列。
+    成绩齐全的学生类型为'完整'，存在缺失的为'转入'。
+
+    partition_by 为分区列（如 ['入学年份', '专业']）时，每个分区单独排名，
+    '总人数' 为所在分区的人数；数据量较大且 workers 大于1时各分区在进程池中并行排名。
+    """
+    partition_by = list(partition_by or [])
+    df = df_merged[['学号'] + list(credits) + partition_by].copy()
+    df['加权平均分'], complete = compute_weighted_scores(df, credits)
+    df['学生类型'] = np.where(complete, '完整', '转入')
+
+    # 完整学生在前、转入学生在后，与原逐行实现的排序输入保持一致
+    df = pd.concat([df[complete], df[~complete]])
+
+    if not partition_by:
+        # 按加权平均分降序排序，同分保持输入顺序（与 grade_core 一致）
+        df = df.sort_values('加权平均分', ascending=False, kind='stable').reset_index(drop=True)
+
+        # 添加排名
+        df.insert(0, '排名', range(1, len(df) + 1))
+        df['总人数'] = len(df)
+        return df
+
+    groups = [group for _, group in df.groupby(partition_by, sort=True, dropna=False)]
+    if workers and workers > 1 and len(groups) > 1 and len(df) >= PARALLEL_MIN_ROWS:
+        log(f"🔀 {len(groups)} 个分区，使用 {workers} 个进程并行排名")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            ranked = list(executor.map(_rank_partitions, groups, [partition_by] * len(groups)))
+        return pd.concat(ranked, ignore_index=True)
+
+    return _rank_partitions(df, partition_by)
+
+def add_enrollment_year(df):
+    """由学号前四位得到入学年份列（学号形如 2023211233）"""
+    df = df.copy()
+    df['入学年份'] = df['学号'].str[:4]
+    return df
+
+@instrument
+def calculate_weighted_grades(df_year1, df_year2, partition_by=None, workers=None):
+    """
+    计算学分加权成绩
+
+    partition_by 为分区列名列表时按分区分别排名（如按入学年份、专业），
+    分区列取自24-25数据；'入学年份' 不存在时由学号推出。
+    """
+    log("\n🧮 正在计算学分加权成绩...")
+    
+    # 合并数据，以大二名单为准（左连接）
+    df_merged = pd.merge(df_year2, df_year1[['学号', '大一成绩']], on='学号', how='left')
+    
+    partition_by = list(partition_by or [])
+    if '入学年份' in partition_by and '入学年份' not in df_merged.columns:
+        df_merged = add_enrollment_year(df_merged)
+    missing = [col for col in partition_by if col not in df_merged.columns]
+    if missing:
+        raise ValueError(f"分区列不存在: {', '.join(missing)}")
+    
+    complete_count = int(df_merged['大一成绩'].notna().sum())
+    log(f"👥 完整成绩学生: {complete_count} 人")
+    log(f"🔄 转入学生: {len(df_merged) - complete_count} 人")
+    
+    df_results = rank_weighted_grades(df_merged, YEAR_CREDITS, partition_by, workers)
     
     # 重新排列列顺序
-    df_results = df_results[['排名', '学号', '大一成绩', '大二成绩', '加权平均分', '学生类型']]
+    df_results = df_results[['排名', '学号', '大一成绩', '大二成绩', '加权平均分', '学生类型']
+                            + partition_by + ['总人数']]
+    record_rows(rows_in=len(df_year1) + len(df_year2), rows_out=len(df_results))
     
     return df_results
 
-def save_results(df_results):
-    """保存结果"""
-    print("\n💾 正在保存结果...")
+@instrument
+def save_results(df_results, output_file="加权成绩排名.csv", simple_file="最终排名.csv", artifact_file=None):
+    """保存结果；artifact_file 为列式文件路径时额外保存带类型的结果供后续阶段读取"""
+    log("\n💾 正在保存结果...")
+    record_rows(rows_in=len(df_results), rows_out=len(df_results))
     
     # 保存完整结果
-    output_file = Path("加权成绩排名.csv")
+    output_file = Path(output_file)
     df_results.to_csv(output_file, index=False, encoding='utf-8-sig')
     
     # 保存简化版（只有排名、学号、加权平均分）
-    simple_file = Path("最终排名.csv")
+    simple_file = Path(simple_file)
     df_simple = df_results[['排名', '学号', '加权平均分']].copy()
     df_simple.to_csv(simple_file, index=False, encoding='utf-8-sig')
     
-    print(f"✅ 完整结果已保存到: {output_file}")
-    print(f"✅ 简化排名已保存到: {simple_file}")
+    if artifact_file and Path(artifact_file) != Path(output_file):
+        write_table(df_results, artifact_file)
+        log(f"✅ 列式结果已保存到: {artifact_file}")
+    
+    log(f"✅ 完整结果已保存到: {output_file}")
+    log(f"✅ 简化排名已保存到: {simple_file}")
     
     return output_file, simple_file
 
 def print_summary(df_results):
     """打印统计摘要"""
-    print("\n📊 统计摘要:")
-    print("=" * 50)
+    log("\n📊 统计摘要:")
+    log("=" * 50)
     
     complete_students = df_results[df_results['学生类型'] == '完整']
     transfer_students = df_results[df_results['学生类型'] == '转入']
     
-    print(f"📈 总人数: {len(df_results)} 人")
-    print(f"👥 完整成绩学生: {len(complete_students)} 人")
-    print(f"🔄 转入学生: {len(transfer_students)} 人")
+    log(f"📈 总人数: {len(df_results)} 人")
+    log(f"👥 完整成绩学生: {len(complete_students)} 人")
+    log(f"🔄 转入学生: {len(transfer_students)} 人")
     
-    print(f"\n🏆 成绩统计:")
-    print(f"最高分: {df_results['加权平均分'].max():.2f} (排名第1)")
-    print(f"最低分: {df_results['加权平均分'].min():.2f} (排名第{len(df_results)})")
-    print(f"平均分: {df_results['加权平均分'].mean():.2f}")
-    print(f"中位数: {df_results['加权平均分'].median():.2f}")
+    # 与 distribution.py 相同的草图统计，数据量再大也只需一次遍历
+    sketch = ScoreSketch().update(df_results['加权平均分'].tolist())
+    log(f"\n🏆 成绩统计:")
+    if not sketch.count:
+        # 两个学年没有共同学号或成绩全部无法解析时，没有可统计的加权平均分
+        log("无数据")
+    else:
+        log(f"最高分: {sketch.high / 100:.2f} (排名第1)")
+        log(f"最低分: {sketch.low / 100:.2f} (排名第{len(df_results)})")
+        log(f"平均分: {sketch.mean():.2f}")
+        log(f"中位数: {sketch.quantile(0.5):.2f}")
     
-    print(f"\n🥇 前10名:")
+    log(f"\n🥇 前10名:")
     top10 = df_results.head(10)
     for _, student in top10.iterrows():
         type_mark = "🔄" if student['学生类型'] == '转入' else "👤"
-        print(f"  {student['排名']:2d}. {type_mark} {student['学号']} - {student['加权平均分']:.2f}分")
+        log(f"  {student['排名']:2d}. {type_mark} {student['学号']} - {student['加权平均分']:.2f}分")
     
-    print(f"\n📐 学分权重配置:")
-    print(f"大一学分: {CREDITS['year1']} ({CREDITS['year1']/CREDITS['total']*100:.1f}%)")
-    print(f"大二学分: {CREDITS['year2']} ({CREDITS['year2']/CREDITS['total']*100:.1f}%)")
+    log(f"\n📐 学分权重配置:")
+    log(f"大一学分: {CREDITS['year1']} ({CREDITS['year1']/CREDITS['total']*100:.1f}%)")
+    log(f"大二学分: {CREDITS['year2']} ({CREDITS['year2']/CREDITS['total']*100:.1f}%)")
 
 def main():
     """主函数"""
-    print("🎓 学分加权成绩计算系统")
-    print("=" * 50)
+    parser = argparse.ArgumentParser(description="学分加权成绩计算")
+    parser.add_argument("--partition-by", default="",
+                        help="逗号分隔的分区列（如 入学年份,专业），每个分区单独排名")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="分区并行排名的进程数")
+    args = parser.parse_args()
+    partition_by = [col for col in args.partition_by.split(',') if col]
+    
+    log("🎓 学分加权成绩计算系统")
+    log("=" * 50)
     
     # 加载数据
     df_year1, df_year2 = load_data()
@@ -160,7 +271,7 @@ def main():
         return
     
     # 计算加权成绩
-    df_results = calculate_weighted_grades(df_year1, df_year2)
+    df_results = calculate_weighted_grades(df_year1, df_year2, partition_by, args.workers)
     
     # 保存结果
     output_file, simple_file = save_results(df_results)
@@ -168,9 +279,9 @@ def main():
     # 打印摘要
     print_summary(df_results)
     
-    print(f"\n🎉 计算完成! 结果文件:")
-    print(f"📄 {output_file} - 详细成绩表")
-    print(f"📄 {simple_file} - 最终排名表")
+    log(f"\n🎉 计算完成! 结果文件:")
+    log(f"📄 {output_file} - 详细成绩表")
+    log(f"📄 {simple_file} - 最终排名表")
 
 if __name__ == "__main__":
     main()
@@ -2,58 +2,138 @@
 # -*- coding: utf-8 -*-
 """
 将CSV成绩数据转换为JSON格式，供前端查询使用
+
+除完整的 data.json 外，还按学号前缀输出分片文件和清单 (manifest.json)，
+前端查询时只需下载学号所在的分片。
 """
 
-import pandas as pd
+import argparse
 import json
 from pathlib import Path
 
-def convert_csv_to_json():
+from grade_core import load_store
+from binary_index import write_binary_index
+from rank_index import write_rank_index
+from instrumentation import instrument, log, record_rows
+
+# 分片默认按学号前8位划分（每个分片最多100个学号）
+DEFAULT_PREFIX_LEN = 8
+
+def _remove_old_shards(shard_dir):
+    """
+    删除旧清单中列出的分片和清单本身，避免残留已不存在的前缀
+
+    只删除清单列出的文件；目录非空却没有清单时报错，以免把其他目录误当作分片目录清空。
+    """
+    manifest_file = shard_dir / "manifest.json"
+    if not manifest_file.exists():
+        if shard_dir.exists() and any(shard_dir.iterdir()):
+            raise ValueError(f"分片目录非空且没有 manifest.json，拒绝写入: {shard_dir}")
+        return
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    for shard in manifest.get("shards", {}).values():
+        # 清单中的文件名不含路径，防止删除目录以外的文件
+        shard_file = shard_dir / Path(shard["file"]).name
+        if shard_file.is_file():
+            shard_file.unlink()
+    manifest_file.unlink()
+
+@instrument
+def write_shards(store, shard_dir, prefix_len=DEFAULT_PREFIX_LEN):
+    """按学号前缀将 RecordStore 中的记录写为分片JSON，并生成清单文件"""
+    shard_dir = Path(shard_dir)
+    _remove_old_shards(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    # 分片中只保存记录的位置，写出时再生成记录
+    shards = {}
+    for position, student_id in enumerate(store.student_ids()):
+        shards.setdefault(student_id[:prefix_len], []).append(position)
+    record_rows(rows_in=len(store), rows_out=len(shards))
+
+    manifest = {
+        "prefix_len": prefix_len,
+        "total": len(store),
+        "shards": {}
+    }
+    for prefix in sorted(shards):
+        shard_file = f"{prefix}.json"
+        with open(shard_dir / shard_file, 'w', encoding='utf-8') as f:
+            shard = {store.student_id(position): store.record(position) for position in shards[prefix]}
+            json.dump(shard, f, ensure_ascii=False, separators=(',', ':'))
+        manifest["shards"][prefix] = {
+            "file": shard_file,
+            "count": len(shards[prefix])
+        }
+
+    manifest_file = shard_dir / "manifest.json"
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    log(f"✅ 分片数据已保存到: {shard_dir} ({len(shards)} 个分片，前缀长度 {prefix_len})")
+
+    return manifest_file
+
+@instrument
+def convert_csv_to_json(csv_file="build/加权成绩排名.csv", output_file="build/data.json",
+                        shard_dir="build/shards", prefix_len=DEFAULT_PREFIX_LEN, binary_file=None,
+                        rank_index_file="build/rank_index.json"):
     """将加权成绩排名.csv转换为JSON格式"""
     
     # 读取CSV文件
-    csv_file = Path("final_results/加权成绩排名.csv")
+    csv_file = Path(csv_file)
     if not csv_file.exists():
-        print(f"❌ 文件不存在: {csv_file}")
+        log(f"❌ 文件不存在: {csv_file}")
         return
     
-    print("📚 正在读取CSV数据...")
-    df = pd.read_csv(csv_file, encoding='utf-8-sig')
-    
-    print(f"✅ 成功读取 {len(df)} 条记录")
-    
-    # 转换为字典格式，以学号为键
-    data = {}
-    for _, row in df.iterrows():
-        student_id = str(row['学号'])
-        data[student_id] = {
-            "排名": int(row['排名']),
-            "学号": student_id,
-            "大一成绩": row['大一成绩'] if pd.notna(row['大一成绩']) else None,
-            "大二成绩": float(row['大二成绩']),
-            "加权平均分": float(row['加权平均分']),
-            "学生类型": row['学生类型']
-        }
+    log("📚 正在读取CSV数据...")
+    # 按列紧凑保存，以学号去重
+    store = load_store(csv_file)
     
-    # 保存为JSON文件
-    output_file = Path("data.json")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    log(f"✅ 成功读取 {len(store)} 条记录")
     
-    print(f"✅ JSON文件已保存到: {output_file}")
+    record_rows(rows_in=len(store), rows_out=len(store))
     
-    # 显示统计信息
-    complete_students = len([v for v in data.values() if v['学生类型'] == '完整'])
-    transfer_students = len([v for v in data.values() if v['学生类型'] == '转入'])
+    # 保存为JSON文件（逐条写出临时文件再替换，查询服务热加载时不会读到写了一半的文件）
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    output_file = store.write_json(output_file)
+    
+    log(f"✅ JSON文件已保存到: {output_file}")
     
-    print(f"\n📊 数据统计:")
-    print(f"总学生数: {len(data)}")
-    print(f"完整成绩学生: {complete_students}")
-    print(f"转入学生: {transfer_students}")
-    print(f"最高分: {max(v['加权平均分'] for v in data.values()):.2f}")
-    print(f"最低分: {min(v['加权平均分'] for v in data.values()):.2f}")
+    # 保存分片文件
+    if shard_dir:
+        write_shards(store, shard_dir, prefix_len)
     
-    return data
+    # 保存分数-排名索引（前端据此计算百分位）
+    if rank_index_file:
+        write_rank_index(store.scores(), rank_index_file)
+    
+    # 保存二进制索引（供批量查询工具使用）
+    if binary_file:
+        write_binary_index(store, binary_file)
+    
+    # 显示统计信息
+    log(f"\n📊 数据统计:")
+    log(f"总学生数: {len(store)}")
+    log(f"完整成绩学生: {store.count_type('完整')}")
+    log(f"转入学生: {store.count_type('转入')}")
+    scores = store.scores()
+    log(f"最高分: {max(scores):.2f}")
+    log(f"最低分: {min(scores):.2f}")
+    
+    return store
 
 if __name__ == "__main__":
-    convert_csv_to_json()
+    parser = argparse.ArgumentParser(description="将加权成绩排名CSV转换为前端使用的JSON")
+    parser.add_argument("--input", default="build/加权成绩排名.csv", help="加权成绩排名CSV路径（默认读取流水线的输出）")
+    parser.add_argument("--output", default="build/data.json", help="完整JSON输出路径")
+    parser.add_argument("--shard-dir", default="build/shards", help="分片输出目录")
+    parser.add_argument("--prefix-len", type=int, default=DEFAULT_PREFIX_LEN,
+                        help="分片学号前缀长度，越长分片越小")
+    parser.add_argument("--rank-index", default="build/rank_index.json", help="分数-排名索引输出路径")
+    parser.add_argument("--binary", default=None, help="额外输出定长二进制索引文件（如 data.bin）")
+    args = parser.parse_args()
+
+    convert_csv_to_json(args.input, args.output, args.shard_dir, args.prefix_len, args.binary,
+                        args.rank_index)
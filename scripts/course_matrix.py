@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+课程级成绩的稀疏矩阵计算
+
+输入为逐门课程的成绩记录（学号、学期、课程、学分、成绩），每门课程使用自己的学分，
+不必再手工抄录各学年的学分总数。成绩保存为 学生×课程 的稀疏矩阵（CSR：每个学生只保存修读过的课程），
+按学期、学年和全部课程的加权平均分都由两次稀疏矩阵乘法得到:
+
+    分子 = 成绩矩阵 × (学分 · 分组矩阵)      分母 = 修读矩阵 × (学分 · 分组矩阵)
+
+分组矩阵为 课程×分组 的0/1矩阵（每门课程属于一个学期、一个学年）。分母只累计学生实际修读的课程，
+未选的选修课、缺考或成绩无法解析的课程都不计入学分，加权平均分按已修学分重新归一化。
+成绩和学分为百分之一的整数（见 fixed_point），整数精确计算后四舍五入，规则同 fixed_point.weighted_hundredths。
+
+学期以标签表示，如 '23-24/1'，斜线前为学年（同 registry）。同一学号同一课程出现多次时以最后一条为准；
+同一课程的学分不一致时报错。
+
+用法:
+    python course_matrix.py 课程成绩.csv --output 课程加权成绩.csv
+    # 课程成绩.csv 的列为 学号,学期,课程,学分,成绩（可多出其他列）
+"""
+
+import argparse
+import csv
+import os
+import numpy as np
+
+from fixed_point import CREDIT_SCALE, credit_units, to_hundredths, to_score
+from grade_core import csv_value
+from instrumentation import instrument, log, record_rows
+from registry import split_period
+
+COURSE_FIELDS = ('学号', '学期', '课程', '学分', '成绩')
+# 分组层级：每个学期、每个学年、全部课程
+LEVELS = ('term', 'year', 'total')
+TOTAL_LABEL = '加权平均分'
+# 结果表中各层级的列名前缀；不含'/'的学期标签与学年标签相同，加前缀后不会重名
+COLUMN_PREFIX = {'term': '学期 ', 'year': '学年 ', 'total': ''}
+
+def _csr_matmul(indptr, indices, data, dense):
+    """CSR 稀疏矩阵（int64）乘以稠密矩阵，返回 int64 矩阵；空行的结果为0"""
+    products = data[:, None] * dense[indices]
+    cumulative = np.zeros((len(data) + 1, dense.shape[1]), dtype=np.int64)
+    np.cumsum(products, axis=0, out=cumulative[1:])
+    return cumulative[indptr[1:]] - cumulative[indptr[:-1]]
+
+class CourseMatrix:
+    """
+    学生×课程 的稀疏成绩矩阵
+
+    student_ids[i] 为第 i 行的学号（按首次出现的顺序），courses[j] 为第 j 列的 (学期, 课程)，
+    units[j] 为该课程的学分（百分之一学分）；第 i 行的课程列号为 indices[indptr[i]:indptr[i+1]]
+    （升序），对应成绩（百分之一分）为 data 的同一段。
+    """
+
+    def __init__(self, student_ids, courses, units, indptr, indices, data):
+        self.student_ids = student_ids
+        self.courses = courses
+        self.units = units
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @classmethod
+    def from_records(cls, records):
+        """由 {学号, 学期, 课程, 学分, 成绩} 记录构建，成绩无法解析的记录视为未修读"""
+        student_index = {}
+        course_index = {}
+        course_units = []
+        rows, columns, scores = [], [], []
+        for record in records:
+            score = to_hundredths(record['成绩'])
+            if score is None:
+                continue
+            course = (record['学期'], record['课程'])
+            units = credit_units(float(record['学分']))
+            column = course_index.setdefault(course, len(course_index))
+            if column == len(course_units):
+                course_units.append(units)
+            elif course_units[column] != units:
+                raise ValueError(f"课程学分不一致: {course[0]} {course[1]} "
+                                 f"({course_units[column] / CREDIT_SCALE} / {units / CREDIT_SCALE})")
+            rows.append(student_index.setdefault(record['学号'], len(student_index)))
+            columns.append(column)
+            scores.append(score)
+
+        rows = np.array(rows, dtype=np.int64)
+        columns = np.array(columns, dtype=np.int64)
+        scores = np.array(scores, dtype=np.int64)
+        # 按 (行, 列) 稳定排序，重复的 (学生, 课程) 只保留最后一条
+        order = np.lexsort((columns, rows))
+        rows, columns, scores = rows[order], columns[order], scores[order]
+        last = np.ones(len(rows), dtype=bool)
+        last[:-1] = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])
+        rows, columns, scores = rows[last], columns[last], scores[last]
+
+        indptr = np.zeros(len(student_index) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(student_index)), out=indptr[1:])
+        return cls(list(student_index), list(course_index), np.array(course_units, dtype=np.int64),
+                   indptr, columns, scores)
+
+    @classmethod
+    def from_csv(cls, path):
+        """读取课程成绩CSV（列见 COURSE_FIELDS，其他列忽略），这些列中有空字段的行跳过"""
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            return cls.from_records(row for row in csv.DictReader(f)
+                                    if all(row.get(field) not in (None, '') for field in COURSE_FIELDS))
+
+    @property
+    def shape(self):
+        return len(self.student_ids), len(self.courses)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def groups(self, level):
+        """返回 (分组标签列表, 每门课程所属分组的序号数组)，level 为 LEVELS 之一"""
+        if level == 'term':
+            keys = [term for term, _ in self.courses]
+        elif level == 'year':
+            keys = [split_period(term)[0] for term, _ in self.courses]
+        elif level == 'total':
+            keys = [TOTAL_LABEL] * len(self.courses)
+        else:
+            raise ValueError(f"未知的分组层级: {level}")
+        labels = sorted(set(keys))
+        position = {label: i for i, label in enumerate(labels)}
+        return labels, np.array([position[key] for key in keys], dtype=np.int64)
+
+    def weighted(self, level='total'):
+        """
+        各学生在每个分组内的加权平均分
+
+        返回 (分组标签, 加权平均分矩阵, 已修学分矩阵)：加权平均分为百分之一分（浮点数，未修读该组任何课程为 NaN），
+        已修学分为百分之一学分的整数，两者均为 学生×分组。
+        """
+        labels, group_of = self.groups(level)
+        weights = np.zeros((len(self.courses), len(labels)), dtype=np.int64)
+        weights[np.arange(len(self.courses)), group_of] = self.units
+
+        numerator = _csr_matmul(self.indptr, self.indices, self.data, weights)
+        denominator = _csr_matmul(self.indptr, self.indices, np.ones_like(self.data), weights)
+        rounded = (2 * numerator + denominator) // np.maximum(2 * denominator, 1)
+        return labels, np.where(denominator > 0, rounded, np.nan), denominator
+
+    def course_credits(self, level='term'):
+        """各分组的课程学分合计（含选修课，即全部课程都修读时的学分），返回 {标签: 学分}"""
+        labels, group_of = self.groups(level)
+        totals = np.bincount(group_of, weights=self.units, minlength=len(labels))
+        return {label: total / CREDIT_SCALE for label, total in zip(labels, totals)}
+
+@instrument
+def rank_courses(matrix):
+    """
+    计算学期、学年和累计加权平均分，按累计加权平均分降序排名
+
+    返回 (列名列表, 按名次排列的结果字典列表)，学期和学年的列名分别为 '学期 <标签>'、'学年 <标签>'；
+    同分保持学生首次出现的顺序，无法计算的排在最后。
+    """
+    columns = ['排名', '学号']
+    values = {}
+    for level in LEVELS:
+        labels, scores, _ = matrix.weighted(level)
+        for i, label in enumerate(labels):
+            column = COLUMN_PREFIX[level] + label
+            columns.append(column)
+            values[column] = scores[:, i]
+    _, _, units = matrix.weighted('total')
+    earned = units[:, 0]
+    columns += ['已修学分', '总人数']
+
+    total = values[TOTAL_LABEL]
+    order = np.lexsort((-np.nan_to_num(total, nan=0.0), np.isnan(total)))
+    rows = []
+    for rank, i in enumerate(order, 1):
+        row = {'排名': rank, '学号': matrix.student_ids[i], '已修学分': earned[i] / CREDIT_SCALE,
+               '总人数': len(order)}
+        for label, scores in values.items():
+            row[label] = None if np.isnan(scores[i]) else to_score(int(scores[i]))
+        rows.append(row)
+    record_rows(rows_in=matrix.nnz, rows_out=len(rows))
+    return columns, rows
+
+@instrument
+def write_course_grades(columns, rows, output_file="课程加权成绩.csv"):
+    """保存课程级加权成绩排名CSV（缺失值为空）"""
+    with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([csv_value(row[column]) for column in columns])
+    return output_file
+
+def main():
+    parser = argparse.ArgumentParser(description="由课程级成绩计算学期、学年和累计学分加权平均分")
+    parser.add_argument("input", help="课程成绩CSV，列为 学号,学期,课程,学分,成绩")
+    parser.add_argument("--output", default="课程加权成绩.csv", help="结果输出路径")
+    args = parser.parse_args()
+
+    matrix = CourseMatrix.from_csv(args.input)
+    students, courses = matrix.shape
+    density = matrix.nnz / (students * courses) if students and courses else 0
+    log(f"📚 {students} 名学生 × {courses} 门课程，{matrix.nnz} 条成绩（稠密度 {density:.1%}）")
+    for term, credits in matrix.course_credits('term').items():
+        log(f"   {term}: 课程学分合计 {credits:g}")
+
+    columns, rows = rank_courses(matrix)
+    write_course_grades(columns, rows, args.output)
+    log(f"✅ 课程加权成绩已保存到: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量发布：比较上次发布的成绩数据与新结果，只输出变化的记录
+
+旧数据整体载入为字典，新数据逐条读取比较，耗时与记录数成线性关系。输出到 output_dir:
+    delta.json           补丁：新增的完整记录、变化记录中变化和被去掉的字段、删除的学号、受影响的分片前缀
+    changed_shards.txt   受影响的分片前缀，每行一个（用于只重新上传/刷新这些分片的缓存）
+    变更报告.md           供人阅读的变更说明：成绩变化逐条列出，仅名次变化的只汇总并列出变动最大的
+
+两侧数据可以是 data.json、分片目录（含 manifest.json）或发布包目录（含 bundle.json）。
+
+用法:
+    python delta.py --old ../data.json --new ../build/data.json --output-dir ../build/delta
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+from convert_csv_to_json import DEFAULT_PREFIX_LEN
+from publish import MANIFEST_FILE as BUNDLE_MANIFEST, minify
+from instrumentation import instrument, log, record_rows
+
+# 成绩更正会改变的字段；排名和总人数的变化是其他学生成绩变化的连带结果
+SCORE_FIELDS = ('大一成绩', '大二成绩', '加权平均分', '学生类型')
+
+PATCH_FILE = "delta.json"
+SHARD_LIST_FILE = "changed_shards.txt"
+REPORT_FILE = "变更报告.md"
+
+def published_prefix_len(source):
+    """分片目录或发布包的学号前缀长度，单个 data.json 返回 None"""
+    source = Path(source)
+    for manifest_name in ("manifest.json", BUNDLE_MANIFEST):
+        if (source / manifest_name).exists():
+            with open(source / manifest_name, 'r', encoding='utf-8') as f:
+                return json.load(f)['prefix_len']
+    return None
+
+def iter_published(source):
+    """逐个产出已发布数据中的 (学号, 记录)，分片按清单顺序读取"""
+    source = Path(source)
+    if not source.is_dir():
+        with open(source, 'r', encoding='utf-8') as f:
+            yield from json.load(f).items()
+        return
+
+    if (source / BUNDLE_MANIFEST).exists():
+        with open(source / BUNDLE_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    else:
+        with open(source / "manifest.json", 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    for shard in manifest['shards'].values():
+        with open(source / shard['file'], 'r', encoding='utf-8') as f:
+            yield from json.load(f).items()
+
+class _Fingerprint:
+    """与记录顺序无关的数据指纹：各记录紧凑JSON的SHA-256之和，data.json 和分片得到相同的值"""
+
+    def __init__(self):
+        self.total = 0
+
+    def update(self, student_id, record):
+        digest = hashlib.sha256(minify({student_id: record})).digest()
+        self.total = (self.total + int.from_bytes(digest, 'big')) % (1 << 256)
+
+    def hexdigest(self):
+        return self.total.to_bytes(32, 'big').hex()[:12]
+
+def _changed_fields(old, new):
+    return {field: value for field, value in new.items() if field not in old or old[field] != value}
+
+def _dropped_fields(old, new):
+    """旧记录有而新记录没有的字段"""
+    return [field for field in old if field not in new]
+
+@instrument
+def diff_records(old_source, new_source, prefix_len=None):
+    """
+    比较两份已发布数据，返回补丁字典
+
+    补丁格式:
+        {"from": 旧数据指纹, "to": 新数据指纹, "prefix_len": 前缀长度,
+         "added": {学号: 完整记录}, "changed": {学号: {字段: 新值}}, "dropped": {学号: [去掉的字段]},
+         "removed": [学号], "shards": [受影响的分片前缀]}
+    dropped 只包含有字段被去掉的记录（如新版本不再输出某一列），这些学号同时出现在 changed 中。
+    指纹与记录顺序无关，客户端可据此确认补丁适用于手中的版本。
+    """
+    prefix_len = prefix_len or published_prefix_len(new_source) or published_prefix_len(old_source) \
+        or DEFAULT_PREFIX_LEN
+
+    old_digest = _Fingerprint()
+    old_records = {}
+    for student_id, record in iter_published(old_source):
+        old_digest.update(student_id, record)
+        old_records[student_id] = record
+
+    new_digest = _Fingerprint()
+    added = {}
+    changed = {}
+    dropped = {}
+    seen = 0
+    for student_id, record in iter_published(new_source):
+        new_digest.update(student_id, record)
+        seen += 1
+        old = old_records.pop(student_id, None)
+        if old is None:
+            added[student_id] = record
+        elif old != record:
+            changed[student_id] = _changed_fields(old, record)
+            fields = _dropped_fields(old, record)
+            if fields:
+                dropped[student_id] = fields
+    removed = sorted(old_records)
+
+    shards = sorted({student_id[:prefix_len] for student_id in [*added, *changed, *removed]})
+    record_rows(rows_in=seen + len(removed), rows_out=len(added) + len(changed) + len(removed))
+    return {
+        "from": old_digest.hexdigest(),
+        "to": new_digest.hexdigest(),
+        "prefix_len": prefix_len,
+        "added": added,
+        "changed": changed,
+        "dropped": dropped,
+        "removed": removed,
+        "shards": shards,
+    }
+
+def apply_patch(records, patch):
+    """把补丁应用到 {学号: 记录} 字典上（原地修改并返回）"""
+    for student_id in patch['removed']:
+        records.pop(student_id, None)
+    for student_id, fields in patch['changed'].items():
+        records[student_id] = {**records[student_id], **fields}
+    for student_id, fields in patch.get('dropped', {}).items():
+        for field in fields:
+            records[student_id].pop(field, None)
+    records.update(patch['added'])
+    return records
+
+def _format_value(value):
+    return '-' if value is None else str(value)
+
+def format_report(patch, old_records=None, top_n=20):
+    """
+    生成Markdown格式的变更报告
+
+    old_records 为旧数据的 {学号: 记录} 字典时，报告中同时列出变化前的值。
+    """
+    old_records = old_records or {}
+    score_changes = {student_id: fields for student_id, fields in patch['changed'].items()
+                     if any(field in fields for field in SCORE_FIELDS)}
+    dropped = patch.get('dropped', {})
+    rank_only = {student_id: fields for student_id, fields in patch['changed'].items()
+                 if student_id not in score_changes and student_id not in dropped}
+
+    lines = [
+        "# 成绩变更报告",
+        "",
+        f"- 数据版本: `{patch['from']}` → `{patch['to']}`",
+        f"- 新增 {len(patch['added'])} 人，删除 {len(patch['removed'])} 人，"
+        f"成绩变化 {len(score_changes)} 人，仅名次变化 {len(rank_only)} 人"
+        + (f"，去掉字段 {len(dropped)} 人" if dropped else ""),
+        f"- 受影响分片 {len(patch['shards'])} 个: {', '.join(patch['shards']) or '无'}",
+    ]
+
+    if score_changes:
+        lines += ["", "## 成绩变化", "", "| 学号 | 字段 | 原值 | 新值 |", "| --- | --- | --- | --- |"]
+        for student_id, fields in score_changes.items():
+            old = old_records.get(student_id, {})
+            for field, value in fields.items():
+                lines.append(f"| {student_id} | {field} | {_format_value(old.get(field))} | {_format_value(value)} |")
+
+    if dropped:
+        lines += ["", "## 去掉的字段", ""]
+        lines += [f"- {student_id}: {', '.join(fields)}" for student_id, fields in dropped.items()]
+
+    if patch['added'] or patch['removed']:
+        lines += ["", "## 新增与删除", ""]
+        lines += [f"- 新增 {student_id}（第{record['排名']}名，加权平均分 {_format_value(record['加权平均分'])}）"
+                  for student_id, record in patch['added'].items()]
+        lines += [f"- 删除 {student_id}" for student_id in patch['removed']]
+
+    shifts = []
+    for student_id, fields in patch['changed'].items():
+        old_rank = old_records.get(student_id, {}).get('排名')
+        if '排名' in fields and old_rank is not None:
+            shifts.append((abs(fields['排名'] - old_rank), student_id, old_rank, fields['排名']))
+    if shifts:
+        shifts.sort(key=lambda shift: (-shift[0], shift[3]))
+        lines += ["", f"## 名次变动（共 {len(shifts)} 人，最多列出 {top_n} 人）", "",
+                  "| 学号 | 原名次 | 新名次 | 变动 |", "| --- | --- | --- | --- |"]
+        for _, student_id, old_rank, new_rank in shifts[:top_n]:
+            lines.append(f"| {student_id} | {old_rank} | {new_rank} | {old_rank - new_rank:+d} |")
+
+    return '\n'.join(lines) + '\n'
+
+@instrument
+def write_delta(old_source, new_source, output_dir="delta", prefix_len=None, top_n=20):
+    """比较并写出补丁、受影响分片列表和变更报告，返回补丁文件路径"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    patch = diff_records(old_source, new_source, prefix_len)
+    # 报告需要变化前的值，只取变化记录的旧版本
+    wanted = set(patch['changed'])
+    old_records = {student_id: record for student_id, record in iter_published(old_source)
+                   if student_id in wanted}
+
+    patch_file = output_dir / PATCH_FILE
+    patch_file.write_bytes(minify(patch))
+    with open(output_dir / SHARD_LIST_FILE, 'w', encoding='utf-8') as f:
+        f.writelines(f"{prefix}\n" for prefix in patch['shards'])
+    with open(output_dir / REPORT_FILE, 'w', encoding='utf-8') as f:
+        f.write(format_report(patch, old_records, top_n))
+
+    changes = len(patch['added']) + len(patch['changed']) + len(patch['removed'])
+    log(f"✅ 增量补丁已保存到: {patch_file} ({changes} 条记录变化，{len(patch['shards'])} 个分片受影响，"
+        f"{patch_file.stat().st_size / 1024:.1f}KB)")
+    return patch_file
+
+def main():
+    parser = argparse.ArgumentParser(description="比较上次发布的数据与新结果，输出增量补丁和变更报告")
+    parser.add_argument("--old", required=True, help="上次发布的 data.json、分片目录或发布包目录")
+    parser.add_argument("--new", required=True, help="新的 data.json、分片目录或发布包目录")
+    parser.add_argument("--output-dir", default="delta", help="补丁和报告的输出目录")
+    parser.add_argument("--prefix-len", type=int, default=None,
+                        help="分片学号前缀长度（默认取分片清单中的值）")
+    parser.add_argument("--top-n", type=int, default=20, help="报告中列出的名次变动最大的人数")
+    args = parser.parse_args()
+
+    write_delta(args.old, args.new, args.output_dir, args.prefix_len, args.top_n)
+
+if __name__ == "__main__":
+    main()
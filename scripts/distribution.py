@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+成绩分布统计：可合并的流式分位数草图
+
+ScoreSketch 逐条接收分数，按百分之一分（或更粗的 resolution）计数，同时累计人数、和、平方和、最值。
+计数只与不同分数的个数有关（0-100分最多10001个），与记录数无关；
+两个草图相加即为合并数据的草图，因此可以按文件、分区或学年分别统计后再合并，结果与一次统计全部数据相同。
+
+resolution=1 时分位数、均值、标准差都是精确值（分位数与 pandas 的线性插值定义一致）；
+resolution=k 时分数按 k 个百分之一分分桶，分位数误差不超过 k/100 分，均值、标准差、最值仍为精确值。
+
+输出的 distribution.json 为紧凑JSON，只含各组的摘要（分位数、直方图、均值等），体积很小，
+由 publish.py 放入发布包，供看板和网页显示分位区间；
+--sketch 另存完整草图，之后可用 merge 子命令与其他草图合并。
+
+用法:
+    python distribution.py build ../data/加权成绩排名.csv --output ../build/distribution.json
+    python distribution.py build 2023级.csv 2024级.csv --sketch 草图.json --workers 4
+    python distribution.py merge 草图1.json 草图2.json --output ../build/distribution.json
+"""
+
+import argparse
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from fixed_point import to_hundredths
+from grade_core import iter_ranking
+from instrumentation import instrument, log, record_rows
+
+SCORE_COLUMNS = ('加权平均分', '大一成绩', '大二成绩')
+DEFAULT_GROUP_BY = ('学生类型',)
+ALL_GROUP = "全部"
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+class ScoreSketch:
+    """单个分数列的可合并草图"""
+
+    __slots__ = ('resolution', 'counts', 'count', 'missing', 'total', 'total_sq', 'low', 'high')
+
+    def __init__(self, resolution=1):
+        """resolution 为分桶宽度（单位百分之一分），1 表示精确统计"""
+        self.resolution = resolution
+        self.counts = {}
+        self.count = 0
+        self.missing = 0
+        self.total = 0
+        self.total_sq = 0
+        self.low = None
+        self.high = None
+
+    def add(self, score):
+        """加入一个分数，None/NaN 计为缺失"""
+        value = to_hundredths(score)
+        if value is None:
+            self.missing += 1
+            return
+        bucket = value // self.resolution
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+        if self.low is None or value < self.low:
+            self.low = value
+        if self.high is None or value > self.high:
+            self.high = value
+
+    def update(self, scores):
+        for score in scores:
+            self.add(score)
+        return self
+
+    def merge(self, other):
+        """把另一个草图合并进来（原地修改并返回自身）"""
+        if other.resolution != self.resolution:
+            raise ValueError(f"分桶宽度不同的草图不能合并: {self.resolution} != {other.resolution}")
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.missing += other.missing
+        self.total += other.total
+        self.total_sq += other.total_sq
+        for value in (other.low, other.high):
+            if value is not None:
+                self.low = value if self.low is None else min(self.low, value)
+                self.high = value if self.high is None else max(self.high, value)
+        return self
+
+    def __len__(self):
+        return self.count
+
+    def _bucket_value(self, bucket):
+        """桶的代表值（百分之一分），精确统计时即分数本身"""
+        if self.resolution == 1:
+            return bucket
+        value = bucket * self.resolution + (self.resolution - 1) / 2
+        return min(max(value, self.low), self.high)
+
+    def quantiles(self, qs=DEFAULT_QUANTILES):
+        """
+        多个分位数（分），一次遍历计数求出
+
+        定义同 pandas/numpy 的线性插值：排序后第 (n-1)*q 个位置，非整数位置在相邻两个值之间插值。
+        """
+        if not self.count:
+            return [None for _ in qs]
+        # 需要的各个位置（从0开始的名次）及其插值权重
+        wanted = []
+        for q in qs:
+            position = (self.count - 1) * q
+            lower = math.floor(position)
+            wanted.append((lower, min(lower + 1, self.count - 1), position - lower))
+        needed = sorted({p for lower, upper, _ in wanted for p in (lower, upper)})
+
+        values = {}
+        seen = 0
+        pending = iter(needed)
+        target = next(pending)
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            while target is not None and target < seen:
+                values[target] = self._bucket_value(bucket)
+                target = next(pending, None)
+            if target is None:
+                break
+
+        results = []
+        for lower, upper, fraction in wanted:
+            value = values[lower] + (values[upper] - values[lower]) * fraction
+            results.append(round(value / 100, 4))
+        return results
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def mean(self):
+        return self.total / self.count / 100 if self.count else None
+
+    def std(self):
+        """样本标准差（ddof=1，同 pandas）"""
+        if self.count < 2:
+            return None
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0)) / 100
+
+    def histogram(self, width=1.0):
+        """按 width 分宽的直方图：{"start": 第一个区间的下界, "width": 区间宽度, "counts": [人数, ...]}"""
+        if not self.count:
+            return {"start": None, "width": width, "counts": []}
+        step = int(round(width * 100))
+        bins = {}
+        for bucket, count in self.counts.items():
+            index = int(self._bucket_value(bucket)) // step
+            bins[index] = bins.get(index, 0) + count
+        first, last = min(bins), max(bins)
+        return {"start": first * step / 100, "width": width,
+                "counts": [bins.get(index, 0) for index in range(first, last + 1)]}
+
+    def summary(self, qs=DEFAULT_QUANTILES, histogram_width=1.0):
+        """供发布的摘要"""
+        std = self.std()
+        return {
+            "count": self.count,
+            "missing": self.missing,
+            "min": None if self.low is None else self.low / 100,
+            "max": None if self.high is None else self.high / 100,
+            "mean": None if not self.count else round(self.mean(), 4),
+            "std": None if std is None else round(std, 4),
+            "quantiles": {f"p{q * 100:g}": value for q, value in zip(qs, self.quantiles(qs))},
+            "histogram": self.histogram(histogram_width),
+            "resolution": self.resolution / 100,
+        }
+
+    def to_dict(self):
+        return {
+            "resolution": self.resolution,
+            "count": self.count,
+            "missing": self.missing,
+            "total": self.total,
+            "total_sq": self.total_sq,
+            "min": self.low,
+            "max": self.high,
+            "counts": sorted(self.counts.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['resolution'])
+        sketch.counts = {bucket: count for bucket, count in data['counts']}
+        sketch.count = data['count']
+        sketch.missing = data['missing']
+        sketch.total = data['total']
+        sketch.total_sq = data['total_sq']
+        sketch.low = data['min']
+        sketch.high = data['max']
+        return sketch
+
+def _group_keys(row, group_by):
+    """一条记录所属的组：全部，以及每个分组列的取值（多个分组列时为组合）"""
+    if not group_by:
+        return (ALL_GROUP,)
+    return (ALL_GROUP, '/'.join(str(row.get(column, '')) for column in group_by))
+
+def sketch_file(path, columns=SCORE_COLUMNS, group_by=DEFAULT_GROUP_BY, resolution=1):
+    """
+    流式读取一个加权成绩排名表，返回 ({列名: {组名: ScoreSketch}}, 记录数)
+
+    文件中不存在的成绩列被忽略。
+    """
+    sketches = {}
+    rows = 0
+    for row in iter_ranking(path):
+        rows += 1
+        for column in columns:
+            if column not in row:
+                continue
+            groups = sketches.setdefault(column, {})
+            for group in _group_keys(row, group_by):
+                if group not in groups:
+                    groups[group] = ScoreSketch(resolution)
+                groups[group].add(row[column])
+    return sketches, rows
+
+def merge_sketches(target, other):
+    """合并两组 {列名: {组名: ScoreSketch}}（原地修改 target 并返回）"""
+    for column, groups in other.items():
+        target_groups = target.setdefault(column, {})
+        for group, sketch in groups.items():
+            if group in target_groups:
+                target_groups[group].merge(sketch)
+            else:
+                target_groups[group] = sketch
+    return target
+
+@instrument
+def build_sketches(paths, columns=SCORE_COLUMNS, group_by=DEFAULT_GROUP_BY, resolution=1, workers=1):
+    """逐个文件统计草图后合并，workers 大于1且有多个文件时在进程池中并行"""
+    paths = [Path(path) for path in paths]
+    if workers and workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(sketch_file, paths, [columns] * len(paths),
+                                        [group_by] * len(paths), [resolution] * len(paths)))
+    else:
+        results = [sketch_file(path, columns, group_by, resolution) for path in paths]
+
+    sketches = {}
+    rows = 0
+    for file_sketches, file_rows in results:
+        merge_sketches(sketches, file_sketches)
+        rows += file_rows
+    record_rows(rows_in=rows, rows_out=sum(len(groups) for groups in sketches.values()))
+    return sketches
+
+def sketches_to_dict(sketches):
+    return {column: {group: sketch.to_dict() for group, sketch in groups.items()}
+            for column, groups in sketches.items()}
+
+def sketches_from_dict(data):
+    return {column: {group: ScoreSketch.from_dict(sketch) for group, sketch in groups.items()}
+            for column, groups in data.items()}
+
+def distribution_artifact(sketches, qs=DEFAULT_QUANTILES, histogram_width=1.0):
+    """发布用的分布摘要：{列名: {组名: 摘要}}"""
+    return {column: {group: sketch.summary(qs, histogram_width) for group, sketch in groups.items()}
+            for column, groups in sketches.items()}
+
+def write_distribution(sketches, output_file, sketch_file=None, qs=DEFAULT_QUANTILES, histogram_width=1.0):
+    """写出分布摘要（以及可选的完整草图），返回摘要文件路径"""
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(distribution_artifact(sketches, qs, histogram_width), f, ensure_ascii=False,
+                  separators=(',', ':'))
+    if sketch_file:
+        with open(sketch_file, 'w', encoding='utf-8') as f:
+            json.dump(sketches_to_dict(sketches), f, ensure_ascii=False)
+
+    overall = sketches.get('加权平均分', {}).get(ALL_GROUP)
+    if overall is not None and overall.count:
+        p10, p50, p90 = overall.quantiles((0.1, 0.5, 0.9))
+        log(f"📊 加权平均分: {overall.count} 人，P10 {p10:.2f} / 中位数 {p50:.2f} / P90 {p90:.2f}")
+    log(f"✅ 分布统计已保存到: {output_file}")
+    return output_file
+
+def main():
+    parser = argparse.ArgumentParser(description="用可合并的流式草图统计成绩分布")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="从加权成绩排名表统计")
+    build_parser.add_argument("inputs", nargs="+", help="加权成绩排名表（可多个，结果合并）")
+    build_parser.add_argument("--group-by", default=','.join(DEFAULT_GROUP_BY),
+                              help="逗号分隔的分组列（如 学生类型,专业），空字符串表示只统计全部")
+    build_parser.add_argument("--resolution", type=int, default=1,
+                              help="分桶宽度（单位百分之一分），大于1时分位数误差不超过该值")
+    build_parser.add_argument("--workers", type=int, default=1, help="并行统计多个文件的进程数")
+
+    merge_parser = subparsers.add_parser("merge", help="合并已保存的草图")
+    merge_parser.add_argument("inputs", nargs="+", help="build --sketch 保存的草图文件")
+
+    for sub in (build_parser, merge_parser):
+        sub.add_argument("--output", default="build/distribution.json", help="分布摘要输出路径")
+        sub.add_argument("--sketch", default=None, help="同时保存完整草图，供之后合并")
+        sub.add_argument("--histogram-width", type=float, default=1.0, help="直方图区间宽度（分）")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        group_by = tuple(column for column in args.group_by.split(',') if column)
+        sketches = build_sketches(args.inputs, group_by=group_by, resolution=args.resolution,
+                                  workers=args.workers)
+    else:
+        sketches = {}
+        for path in args.inputs:
+            with open(path, 'r', encoding='utf-8') as f:
+                merge_sketches(sketches, sketches_from_dict(json.load(f)))
+
+    write_distribution(sketches, args.output, args.sketch, histogram_width=args.histogram_width)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word文档（.docx）表格的流式读取（仅依赖标准库）
+
+直接从zip包中读取 word/document.xml，用增量XML解析逐行产出表格行，
+不构建 python-docx 的完整文档对象；读完的行随即从解析树中移除，内存占用与文档大小无关。
+
+单元格文本与 python-docx 的 cell.text 一致：单元格内各段落用换行连接，
+横向合并的单元格（gridSpan）按所占列数重复，纵向合并的后续单元格（vMerge）取上方单元格的文本。
+只读取顶层表格，嵌套表格的内容被忽略。
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+BODY = W + 'body'
+TBL = W + 'tbl'
+TR = W + 'tr'
+TC = W + 'tc'
+P = W + 'p'
+TEXT = W + 't'
+TAB = W + 'tab'
+BREAKS = (W + 'br', W + 'cr')
+TC_PR = W + 'tcPr'
+GRID_SPAN = W + 'gridSpan'
+V_MERGE = W + 'vMerge'
+VAL = W + 'val'
+
+def _paragraph_text(paragraph):
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == TEXT:
+            parts.append(node.text or '')
+        elif node.tag == TAB:
+            parts.append('\t')
+        elif node.tag in BREAKS:
+            parts.append('\n')
+    return ''.join(parts)
+
+def _cell_layout(cell):
+    """返回 (占用列数, 是否为纵向合并的后续单元格)"""
+    properties = cell.find(TC_PR)
+    if properties is None:
+        return 1, False
+    span = properties.find(GRID_SPAN)
+    merge = properties.find(V_MERGE)
+    return (int(span.get(VAL, 1)) if span is not None else 1,
+            merge is not None and merge.get(VAL, 'continue') == 'continue')
+
+def _iter_events(docx_path):
+    """增量解析 document.xml，产出 (事件, 元素, 父元素)；'end' 事件时元素的子树已完整"""
+    with zipfile.ZipFile(docx_path) as archive, archive.open('word/document.xml') as f:
+        stack = []
+        for event, element in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                stack.append(element)
+                yield event, element, stack[-2] if len(stack) > 1 else None
+            else:
+                stack.pop()
+                yield event, element, stack[-1] if stack else None
+
+def iter_docx_rows(docx_path):
+    """
+    逐行产出文档中顶层表格的行：(表格序号, 行序号, 单元格文本元组)，序号从0开始
+
+    单元格文本已去除首尾空白。
+    """
+    table_depth = 0
+    table_index = -1
+    row_index = -1
+    cells = []
+    above = {}
+    for event, element, parent in _iter_events(docx_path):
+        tag = element.tag
+        if event == 'start':
+            if tag == TBL:
+                table_depth += 1
+                if table_depth == 1:
+                    table_index += 1
+                    row_index = -1
+                    above = {}
+            elif tag == TR and table_depth == 1:
+                row_index += 1
+                cells = []
+            continue
+
+        if tag == TBL:
+            table_depth -= 1
+        elif table_depth != 1:
+            pass
+        elif tag == TC:
+            text = '\n'.join(_paragraph_text(p) for p in element.findall(P)).strip()
+            span, merged = _cell_layout(element)
+            column = len(cells)
+            if merged:
+                text = above.get(column, text)
+            for offset in range(span):
+                above[column + offset] = text
+                cells.append(text)
+        elif tag == TR:
+            yield table_index, row_index, tuple(cells)
+            parent.remove(element)
+            continue
+
+        # 正文中已处理完的表格和段落从树中移除
+        if parent is not None and parent.tag == BODY:
+            parent.remove(element)
+
+def iter_docx_paragraphs(docx_path):
+    """逐个产出正文中（表格之外）段落的文本"""
+    for event, element, parent in _iter_events(docx_path):
+        if event != 'end' or parent is None or parent.tag != BODY:
+            continue
+        if element.tag == P:
+            yield _paragraph_text(element)
+        parent.remove(element)
+
+def select_columns(rows, columns):
+    """
+    按表头名称选取列
+
+    rows 为 iter_docx_rows 产出的行；每个表格中包含全部 columns 的行视为表头，
+    其后的行产出 (表格序号, 行序号, 所选列的文本元组)。
+    没有表头的表格沿用上一个表格的列位置（如跨页续表）。
+    """
+    positions = None
+    for table_index, row_index, cells in rows:
+        if all(name in cells for name in columns):
+            positions = [cells.index(name) for name in columns]
+            continue
+        if positions is None or len(cells) <= max(positions):
+            continue
+        yield table_index, row_index, tuple(cells[i] for i in positions)
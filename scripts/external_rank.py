@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外存排名：输入大于内存时的学分加权计算
+
+分三步完成，任一时刻内存中最多保存一个分区的大一成绩和 chunk_rows 条待排序记录:
+    1. 分区：逐行读取两个学年的CSV，按学号哈希写入 partitions 个临时分区文件
+    2. 连接：逐个分区把大一成绩载入字典，流式读取同分区的大二成绩计算加权平均分，
+       每满 chunk_rows 条排序后写出一个有序段
+    3. 归并：heapq.merge 多路归并有序段，依次分配全局名次并写出结果；有序段多于 max_fan_in 个时
+       先分批归并为较少的有序段，同时打开的文件数不超过 max_fan_in
+
+结果（含同分顺序）与 grade_core.rank_students 完全一致。临时文件中的成绩均为百分之一分的整数。
+mapreduce_rank 复用这里的分区、连接和归并函数，把连接步骤分给多个进程或机器执行。
+
+用法:
+    python external_rank.py 23-24_neo.csv 24-25.csv --output 加权成绩排名.csv --chunk-rows 200000 --max-fan-in 64
+"""
+
+import argparse
+import csv
+import heapq
+import math
+import tempfile
+import zlib
+from contextlib import ExitStack, closing
+from pathlib import Path
+
+from fixed_point import credit_units, to_hundredths, to_score, weighted_hundredths
+from grade_core import YEAR_CREDITS, YEAR1_FIELDS, iter_rows, write_results
+from instrumentation import instrument, log, record_rows
+
+DEFAULT_PARTITIONS = 16
+DEFAULT_CHUNK_ROWS = 100_000
+# 归并时最多同时打开的有序段数，远低于常见的文件描述符上限
+DEFAULT_MAX_FAN_IN = 64
+
+def _partition_of(student_id, partitions):
+    """学号所在的分区（与进程无关的稳定哈希）"""
+    return zlib.crc32(student_id.encode('utf-8')) % partitions
+
+def _format_score(score):
+    """分数（百分之一分的整数）写入临时文件，缺失为空"""
+    return '' if score is None else str(score)
+
+def _parse_score(text):
+    return None if text == '' else int(text)
+
+def spill_partitions(file_23_24, file_24_25, work_dir, partitions, partition_of=None):
+    """
+    把两个学年的成绩按学号写入分区文件
+
+    partition_of(学号) 返回分区序号，默认按学号哈希。
+    大二记录附带输入序号，大一记录附带在文件中的位置，用于还原同分顺序。
+    返回 (大一分区文件列表, 大二分区文件列表, 读取的行数)。
+    """
+    if partition_of is None:
+        partition_of = lambda student_id: _partition_of(student_id, partitions)
+    year1_files = [work_dir / f"year1-{p}.csv" for p in range(partitions)]
+    year2_files = [work_dir / f"year2-{p}.csv" for p in range(partitions)]
+    rows_in = 0
+    with ExitStack() as stack:
+        year1_writers = [csv.writer(stack.enter_context(open(path, 'w', encoding='utf-8', newline='')))
+                         for path in year1_files]
+        year2_writers = [csv.writer(stack.enter_context(open(path, 'w', encoding='utf-8', newline='')))
+                         for path in year2_files]
+
+        for position, row in enumerate(iter_rows(file_23_24, fieldnames=YEAR1_FIELDS)):
+            student_id = row['学号']
+            year1_writers[partition_of(student_id)].writerow(
+                [student_id, position, _format_score(to_hundredths(row['大一成绩']))])
+            rows_in += 1
+
+        for sequence, row in enumerate(iter_rows(file_24_25)):
+            student_id = row['学号']
+            year2_writers[partition_of(student_id)].writerow(
+                [student_id, sequence, _format_score(to_hundredths(row['课程成绩']))])
+            rows_in += 1
+
+    return year1_files, year2_files, rows_in
+
+def _sort_key(row):
+    """
+    全局排序键：加权平均分降序，无法计算的排最后；
+    同分时完整学生在前、转入学生在后，再按大二名单顺序和大一记录顺序
+    """
+    score = row[4]
+    if score is None:
+        return (1, 0, row[5] == '转入', row[0], row[1])
+    return (0, -score, row[5] == '转入', row[0], row[1])
+
+def _write_run(rows, run_file):
+    rows.sort(key=_sort_key)
+    _write_rows(rows, run_file)
+
+def _write_rows(rows, run_file):
+    """按原顺序写出已排好序的记录"""
+    with open(run_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for sequence, year1_position, student_id, year1_score, weighted, student_type, year2_score in rows:
+            writer.writerow([sequence, year1_position, student_id, _format_score(year1_score),
+                             _format_score(weighted), student_type, _format_score(year2_score)])
+
+def _read_run(run_file):
+    """逐行读取有序段，还原为与 _write_run 输入相同的元组"""
+    with open(run_file, 'r', encoding='utf-8', newline='') as f:
+        for sequence, year1_position, student_id, year1_score, weighted, student_type, year2_score in csv.reader(f):
+            yield (int(sequence), int(year1_position), student_id, _parse_score(year1_score),
+                   _parse_score(weighted), student_type, _parse_score(year2_score))
+
+def join_partitions(year1_files, year2_files, work_dir, credits, chunk_rows, run_name="run"):
+    """
+    逐分区连接并计算加权平均分，写出有序段，返回 (有序段文件列表, 学生记录数)
+
+    有序段命名为 {run_name}-序号.csv，多个进程写同一目录时用不同的 run_name 区分。
+    """
+    units = [credit_units(credit) for credit in credits.values()]
+    run_files = []
+    rows = []
+    total = 0
+
+    def flush():
+        run_file = work_dir / f"{run_name}-{len(run_files)}.csv"
+        _write_run(rows, run_file)
+        run_files.append(run_file)
+        rows.clear()
+
+    for year1_file, year2_file in zip(year1_files, year2_files):
+        year1 = {}
+        with open(year1_file, 'r', encoding='utf-8', newline='') as f:
+            for student_id, position, score in csv.reader(f):
+                year1.setdefault(student_id, []).append((int(position), _parse_score(score)))
+
+        with open(year2_file, 'r', encoding='utf-8', newline='') as f:
+            for student_id, sequence, year2_score in csv.reader(f):
+                year2_score = _parse_score(year2_score)
+                # 同一学号在大一有多条记录时，与左连接一样逐条输出
+                for year1_position, year1_score in year1.get(student_id, [(-1, None)]):
+                    scores = [year1_score, year2_score]
+                    student_type = '转入' if None in scores else '完整'
+                    rows.append((int(sequence), year1_position, student_id, year1_score,
+                                 weighted_hundredths(scores, units), student_type, year2_score))
+                    total += 1
+                    if len(rows) >= chunk_rows:
+                        flush()
+
+    if rows or not run_files:
+        flush()
+    return run_files, total
+
+def _merged(run_files):
+    """同时打开 run_files 并按全局排序键归并（排序键各不相同，结果与归并顺序无关）"""
+    with ExitStack() as stack:
+        runs = [stack.enter_context(closing(_read_run(run_file))) for run_file in run_files]
+        yield from heapq.merge(*runs, key=_sort_key)
+
+def reduce_runs(run_files, max_fan_in=DEFAULT_MAX_FAN_IN, keep_inputs=False):
+    """
+    分批归并，直到有序段不多于 max_fan_in 个，返回剩余的有序段文件列表
+
+    每批最多 max_fan_in 个有序段归并为一个新段（写在原段所在目录，文件名以 merge 开头），
+    归并过的段随即删除；keep_inputs 为真时保留最初传入的有序段（如 mapreduce 中可重试的 map 结果）。
+    """
+    if max_fan_in < 2:
+        raise ValueError(f"max_fan_in 至少为2: {max_fan_in}")
+    run_files = list(run_files)
+    inputs = set(run_files)
+    level = 0
+    while len(run_files) > max_fan_in:
+        merged_files = []
+        for start in range(0, len(run_files), max_fan_in):
+            batch = run_files[start:start + max_fan_in]
+            merged_file = batch[0].with_name(f"merge{level}-{len(merged_files)}-{batch[0].name}")
+            _write_rows(_merged(batch), merged_file)
+            for run_file in batch:
+                if not (keep_inputs and run_file in inputs):
+                    run_file.unlink()
+            merged_files.append(merged_file)
+        log(f"🔀 第 {level + 1} 轮归并: {len(run_files)} 个有序段 → {len(merged_files)} 个")
+        run_files = merged_files
+        level += 1
+    return run_files
+
+def merge_runs(run_files, total, max_fan_in=DEFAULT_MAX_FAN_IN, keep_inputs=False):
+    """
+    多路归并有序段，产出带名次的结果记录
+
+    有序段过多时先用 reduce_runs 分批归并（keep_inputs 含义相同），中间段在归并完成后删除。
+    """
+    inputs = [Path(run_file) for run_file in run_files]
+    run_files = reduce_runs(inputs, max_fan_in, keep_inputs)
+    yield from _ranked(_merged(run_files), total)
+    for run_file in set(run_files) - set(inputs):
+        run_file.unlink()
+
+def _ranked(rows, total):
+    """依次分配名次，转为结果记录"""
+    for rank, row in enumerate(rows, 1):
+        _, _, student_id, year1_score, weighted, student_type, year2_score = row
+        yield {
+            '排名': rank,
+            '学号': student_id,
+            '大一成绩': to_score(year1_score),
+            '大二成绩': to_score(year2_score),
+            '加权平均分': math.nan if weighted is None else to_score(weighted),
+            '学生类型': student_type,
+            '总人数': total,
+        }
+
+@instrument
+def rank_out_of_core(file_23_24, file_24_25, output_file="加权成绩排名.csv", simple_file="最终排名.csv",
+                     credits=YEAR_CREDITS, partitions=DEFAULT_PARTITIONS, chunk_rows=DEFAULT_CHUNK_ROWS,
+                     work_dir=None, max_fan_in=DEFAULT_MAX_FAN_IN):
+    """
+    以有限内存计算学分加权成绩排名并写出结果CSV
+
+    partitions 越多每个分区的大一成绩越少；chunk_rows 为每个有序段的记录数；
+    max_fan_in 为归并时最多同时打开的有序段数。
+    临时文件写在 work_dir（默认系统临时目录）下，完成后删除。
+    """
+    log(f"\n🧮 正在以外存模式计算学分加权成绩（{partitions} 个分区，每段 {chunk_rows} 条）...")
+    with tempfile.TemporaryDirectory(prefix="external_rank-", dir=work_dir) as tmp:
+        tmp = Path(tmp)
+        year1_files, year2_files, rows_in = spill_partitions(file_23_24, file_24_25, tmp, partitions)
+        run_files, total = join_partitions(year1_files, year2_files, tmp, credits, chunk_rows)
+        log(f"🔀 归并 {len(run_files)} 个有序段，共 {total} 名学生")
+        result = write_results(merge_runs(run_files, total, max_fan_in), output_file, simple_file)
+
+    record_rows(rows_in=rows_in, rows_out=total)
+    log(f"✅ 完整结果已保存到: {output_file}")
+    log(f"✅ 简化排名已保存到: {simple_file}")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="外存模式的学分加权成绩排名（适合超过内存的输入）")
+    parser.add_argument("year1", help="23-24成绩CSV（无表头）")
+    parser.add_argument("year2", help="24-25成绩CSV")
+    parser.add_argument("--output", default="加权成绩排名.csv", help="完整结果输出路径")
+    parser.add_argument("--simple", default="最终排名.csv", help="简化排名输出路径")
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS, help="连接时的哈希分区数")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="每个有序段的记录数，即排序时内存中最多保存的记录数")
+    parser.add_argument("--max-fan-in", type=int, default=DEFAULT_MAX_FAN_IN,
+                        help="归并时最多同时打开的有序段数，超过时分多轮归并")
+    parser.add_argument("--work-dir", default=None, help="临时文件目录")
+    args = parser.parse_args()
+
+    rank_out_of_core(args.year1, args.year2, args.output, args.simple, partitions=args.partitions,
+                     chunk_rows=args.chunk_rows, work_dir=args.work_dir, max_fan_in=args.max_fan_in)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+成绩的定点数表示（仅依赖标准库）
+
+成绩以百分之一分为单位的整数保存（85.51 分 → 8551），学分以百分之一学分为单位的整数保存
+（51.8 学分 → 5180）。加权平均分用整数精确计算：
+
+    加权平均分（百分之一分） = Σ 成绩×学分 / Σ 学分，四舍五入到整数
+
+舍入规则：四舍五入，恰好位于两个百分之一分正中间时向上进位（85.505 → 85.51），
+与浮点数计算后 round(..., 2) 不同，结果不受二进制浮点误差影响，同分判定和排名因此稳定。
+输入成绩超过两位小数时按同一规则舍入到百分之一分。
+
+只在输出 CSV/JSON 时才转换回浮点数（hundredths / 100，与原先两位小数的浮点数写法相同）。
+"""
+
+import math
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+SCALE = 100
+CREDIT_SCALE = 100
+
+_SIMPLE_DECIMAL = re.compile(r'-?\d+(\.\d{1,2})?')
+_HUNDREDTH = Decimal('0.01')
+
+def _decimal_to_hundredths(value):
+    return int(value.quantize(_HUNDREDTH, rounding=ROUND_HALF_UP) * SCALE)
+
+def to_hundredths(value):
+    """
+    成绩（字符串、整数或浮点数）转为百分之一分的整数，缺失或无法解析时返回 None
+
+    字符串按十进制精确解析；浮点数按其最短十进制表示解析（85.51 即 85.51，而不是 85.50999...）。
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if _SIMPLE_DECIMAL.fullmatch(value):
+            whole, _, fraction = value.partition('.')
+            hundredths = int(whole) * SCALE + (-1 if whole.startswith('-') else 1) * int(fraction.ljust(2, '0'))
+            return hundredths
+        try:
+            decimal = Decimal(value)
+        except InvalidOperation:
+            return None
+        return _decimal_to_hundredths(decimal) if decimal.is_finite() else None
+    if isinstance(value, int):
+        return value * SCALE
+    value = float(value)
+    if not math.isfinite(value):
+        return None
+    hundredths = round(value * SCALE)
+    if hundredths / SCALE == value:
+        return hundredths
+    return _decimal_to_hundredths(Decimal(repr(value)))
+
+def to_score(hundredths):
+    """百分之一分的整数转回浮点数成绩，None 保持为 None"""
+    return None if hundredths is None else hundredths / SCALE
+
+def credit_units(credit):
+    """学分转为百分之一学分的整数，学分超过两位小数时报错"""
+    units = round(credit * CREDIT_SCALE)
+    if abs(units - credit * CREDIT_SCALE) > 1e-6:
+        raise ValueError(f"学分最多两位小数: {credit}")
+    return units
+
+def round_half_up(numerator, denominator):
+    """numerator / denominator 四舍五入到整数（正中间时向上进位），denominator 须为正数"""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+def weighted_hundredths(scores, units):
+    """
+    加权平均分（百分之一分）
+
+    scores 为百分之一分的整数（缺失为 None），units 为对应的 credit_units；
+    缺失的成绩不计入学分，全部缺失时返回 None。
+    """
+    numerator = 0
+    denominator = 0
+    for score, unit in zip(scores, units):
+        if score is not None:
+            numerator += score * unit
+            denominator += unit
+    if denominator == 0:
+        return None
+    return round_half_up(numerator, denominator)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成模拟的年级成绩数据，用于性能测试
+
+输出格式与真实数据一致:
+    23-24.csv      无表头 学号,智育成绩（全集，包含未进入24-25名单的学生）
+    24-25.csv      有表头 学号,课程成绩
+    24-25排名.md   | 学号 | 课程成绩 | Markdown表格
+    23-24.docx     （可选）与公示Word文档相同的四列表格
+数据中包含转入学生（只有24-25成绩）、重复学号和格式错误的行。
+"""
+
+import argparse
+import random
+from pathlib import Path
+
+# 各类特殊情况占比，参照真实数据（476人中358人进入大二名单，其中10人为转入）
+TRANSFER_RATE = 0.03
+DROPPED_RATE = 0.25
+DUPLICATE_RATE = 0.002
+MALFORMED_RATE = 0.001
+
+FIRST_ID = 2023210000
+
+def _score(rng):
+    """生成一个两位小数的成绩，分布大致与真实数据相近"""
+    return round(min(99.0, max(40.0, rng.gauss(84, 6))), 2)
+
+def generate_cohort(num_students, seed=0):
+    """
+    生成模拟年级数据
+
+    num_students 为进入24-25名单的学生数，返回 (year1_rows, year2_rows)，
+    每行是 (学号, 成绩字符串) 元组，已包含重复和格式错误的行。
+    """
+    rng = random.Random(seed)
+
+    year2 = []
+    year1 = []
+    student_id = FIRST_ID
+    for _ in range(num_students):
+        student_id += rng.randint(1, 3)
+        year2.append((str(student_id), f"{_score(rng)}"))
+        if rng.random() >= TRANSFER_RATE:
+            year1.append((str(student_id), f"{_score(rng)}"))
+
+    # 大一有成绩但未进入大二名单的学生
+    for _ in range(int(num_students * DROPPED_RATE)):
+        student_id += rng.randint(1, 3)
+        year1.append((str(student_id), f"{_score(rng)}"))
+
+    for rows in (year1, year2):
+        for _ in range(max(1, int(len(rows) * DUPLICATE_RATE))):
+            rows.append(rng.choice(rows))
+        for _ in range(max(1, int(len(rows) * MALFORMED_RATE))):
+            bad_id, _ = rng.choice(rows)
+            rows.append(rng.choice([(bad_id, ""), (bad_id, "缺考"), ("", "88.00"), (bad_id + "x", "70.5")]))
+
+    rng.shuffle(year1)
+    return year1, year2
+
+def write_year1_csv(rows, output_file):
+    """写入23-24格式（无表头）"""
+    with open(output_file, 'w', encoding='utf-8-sig') as f:
+        for student_id, score in rows:
+            f.write(f"{student_id},{score}\n")
+
+def write_year2_csv(rows, output_file):
+    """写入24-25格式（有表头）"""
+    with open(output_file, 'w', encoding='utf-8-sig') as f:
+        f.write("学号,课程成绩\n")
+        for student_id, score in rows:
+            f.write(f"{student_id},{score}\n")
+
+def write_year2_md(rows, output_file):
+    """写入24-25排名.md格式的Markdown表格"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("| 学号 | 课程成绩 |\n")
+        f.write("|------|----------|\n")
+        for student_id, score in rows:
+            f.write(f"| {student_id} | {score} |\n")
+
+def write_year1_docx(rows, output_file):
+    """写入与公示Word文档相同结构的表格（学号、姓名、班级、智育成绩）"""
+    from docx import Document
+
+    doc = Document()
+    table = doc.add_table(rows=1, cols=4)
+    for cell, title in zip(table.rows[0].cells, ['学号', '姓名', '班级', '智育成绩']):
+        cell.text = title
+    for student_id, score in rows:
+        cells = table.add_row().cells
+        cells[0].text = student_id
+        cells[1].text = "某同学"
+        cells[2].text = "2023211301"
+        cells[3].text = score
+    doc.save(output_file)
+
+def write_cohort(num_students, output_dir, seed=0, docx=False):
+    """生成并写出一个模拟年级的全部输入文件，返回文件路径字典"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    year1, year2 = generate_cohort(num_students, seed)
+    files = {
+        '23-24': output_dir / "23-24.csv",
+        '24-25': output_dir / "24-25.csv",
+        'md': output_dir / "24-25排名.md",
+    }
+    write_year1_csv(year1, files['23-24'])
+    write_year2_csv(year2, files['24-25'])
+    write_year2_md(year2, files['md'])
+    if docx:
+        files['docx'] = output_dir / "23-24.docx"
+        write_year1_docx(year1, files['docx'])
+
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(description="生成模拟年级成绩数据")
+    parser.add_argument("num_students", type=int, help="进入24-25名单的学生数")
+    parser.add_argument("--output-dir", default="synthetic", help="输出目录")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--docx", action="store_true", help="同时生成Word表格")
+    args = parser.parse_args()
+
+    files = write_cohort(args.num_students, args.output_dir, args.seed, args.docx)
+    print(f"✅ 已生成 {args.num_students} 人的模拟数据:")
+    for path in files.values():
+        print(f"  - {path}")
+
+if __name__ == "__main__":
+    main()
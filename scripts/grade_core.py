@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+成绩计算核心（仅依赖标准库）
+
+学分加权、排名、JSON记录生成和学号查询的纯Python实现，启动时不导入 pandas/numpy，
+适合小规模重算和命令行查询；结果与 calculate_weighted_grades 的 pandas 实现一致。
+只有读写 .feather/.parquet 中间产物时才按需导入 artifacts（pandas + pyarrow）。
+
+排名规则：按加权平均分降序，同分时保持输入顺序（完整学生在前、转入学生在后，
+各自按24-25名单顺序），两种实现共用这一规则。
+成绩以百分之一分的整数参与计算，加权平均分用整数精确计算并四舍五入（见 fixed_point），
+写出结果时才转换为两位小数的浮点数。
+
+用法:
+    python grade_core.py rank 23-24_neo.csv 24-25.csv --output 加权成绩排名.csv --json data.json
+    python grade_core.py lookup data.json 2023211001 2023211002
+    python grade_core.py lookup data/shards 2023211001
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+from pathlib import Path
+
+from fixed_point import credit_units, to_hundredths, to_score, weighted_hundredths
+from record_store import RecordStore
+
+# 学分配置
+CREDITS = {
+    'year1': 51.8,  # 大一总学分 (25.4 + 26.4)
+    'year2': 48.3,  # 大二总学分 (24.9 + 23.4)
+    'total': 100.1  # 总学分
+}
+
+# 各成绩列对应的学分，顺序即加权累加顺序；新增学年时在此追加
+YEAR_CREDITS = {
+    '大一成绩': CREDITS['year1'],
+    '大二成绩': CREDITS['year2'],
+}
+
+RESULT_COLUMNS = ['排名', '学号', '大一成绩', '大二成绩', '加权平均分', '学生类型', '总人数']
+SIMPLE_COLUMNS = ['排名', '学号', '加权平均分']
+
+# 23-24成绩CSV没有表头
+YEAR1_FIELDS = ['学号', '大一成绩']
+
+def parse_score(value):
+    """成绩字符串转为浮点数，无法解析时返回 None（同 pd.to_numeric(errors='coerce')）"""
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(score) else score
+
+def iter_rows(path, fieldnames=None):
+    """逐行读取CSV为字典，跳过含空字段的行（同 dropna）"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f, fieldnames=fieldnames):
+            if all(value not in (None, '') for value in row.values()):
+                yield row
+
+def load_scores(file_23_24="23-24.csv", file_24_25="24-25.csv"):
+    """
+    读取两个学年的成绩
+
+    返回 (大一成绩 {学号: [成绩, ...]}, 大二成绩 [(学号, 成绩), ...])，成绩为百分之一分的整数（无法解析为 None）；
+    大一成绩为无表头CSV，同一学号出现多次时全部保留（与左连接结果一致）。
+    """
+    year1 = {}
+    for row in iter_rows(file_23_24, fieldnames=YEAR1_FIELDS):
+        year1.setdefault(row['学号'], []).append(to_hundredths(row['大一成绩']))
+    year2 = [(row['学号'], to_hundredths(row['课程成绩'])) for row in iter_rows(file_24_25)]
+    return year1, year2
+
+def weighted_score(scores, credits):
+    """
+    按学分计算加权平均分（保留两位小数）
+
+    scores 为浮点数成绩，与 credits 一一对应，缺失的成绩（None）不计入学分；
+    内部按 fixed_point.weighted_hundredths 精确计算。全部缺失时返回 NaN。
+    """
+    weighted = weighted_hundredths([to_hundredths(score) for score in scores],
+                                   [credit_units(credit) for credit in credits])
+    return math.nan if weighted is None else to_score(weighted)
+
+def rank_students(year1, year2, credits=YEAR_CREDITS):
+    """
+    合并两个学年的成绩并排名，返回按名次排列的结果字典列表（键同 RESULT_COLUMNS）
+
+    year1 / year2 为 load_scores 的结果（百分之一分的整数）。
+    以大二名单为准；没有大一成绩的学生为'转入'，其加权平均分即大二成绩。
+    """
+    units = [credit_units(credit) for credit in credits.values()]
+    complete = []
+    transfer = []
+    for student_id, year2_score in year2:
+        for year1_score in year1.get(student_id, [None]):
+            scores = [year1_score, year2_score]
+            row = {
+                '学号': student_id,
+                '大一成绩': year1_score,
+                '大二成绩': year2_score,
+                '加权平均分': weighted_hundredths(scores, units),
+            }
+            if None in scores:
+                row['学生类型'] = '转入'
+                transfer.append(row)
+            else:
+                row['学生类型'] = '完整'
+                complete.append(row)
+
+    # 按整数稳定排序：同分保持输入顺序，无法计算的分数排在最后
+    rows = sorted(complete + transfer,
+                  key=lambda row: (row['加权平均分'] is None, -(row['加权平均分'] or 0)))
+    for rank, row in enumerate(rows, 1):
+        row['排名'] = rank
+        row['总人数'] = len(rows)
+        for column in ('大一成绩', '大二成绩'):
+            row[column] = to_score(row[column])
+        weighted = row['加权平均分']
+        row['加权平均分'] = math.nan if weighted is None else to_score(weighted)
+    return [{column: row[column] for column in RESULT_COLUMNS} for row in rows]
+
+def csv_value(value):
+    """与 DataFrame.to_csv 相同的取值格式（缺失值为空）"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    return value
+
+def write_results(rows, output_file="加权成绩排名.csv", simple_file="最终排名.csv", artifact_file=None):
+    """
+    保存完整和简化排名CSV；artifact_file 为列式文件路径时按需借助 artifacts 额外保存
+
+    两个CSV在一次遍历中写出，不保存列式文件时 rows 可以是迭代器。
+    """
+    with open(output_file, 'w', encoding='utf-8-sig', newline='') as f, \
+         open(simple_file, 'w', encoding='utf-8-sig', newline='') as simple_f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        simple_writer = csv.writer(simple_f, lineterminator=os.linesep)
+        writer.writerow(RESULT_COLUMNS)
+        simple_writer.writerow(SIMPLE_COLUMNS)
+        for row in rows:
+            writer.writerow([csv_value(row[column]) for column in RESULT_COLUMNS])
+            simple_writer.writerow([csv_value(row[column]) for column in SIMPLE_COLUMNS])
+
+    if artifact_file and Path(artifact_file) != Path(output_file):
+        import pandas as pd
+        from artifacts import write_table
+        write_table(pd.DataFrame(rows, columns=RESULT_COLUMNS), artifact_file)
+
+    return Path(output_file), Path(simple_file)
+
+def iter_ranking(path):
+    """
+    逐行读取加权成绩排名表为字典（成绩为浮点数，缺失为 None）
+
+    CSV 用标准库流式解析；.feather/.parquet 才导入 artifacts。
+    """
+    path = Path(path)
+    if path.suffix != '.csv':
+        from artifacts import read_table
+        df = read_table(path)
+        yield from df.astype(object).where(df.notna(), None).to_dict('records')
+        return
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            for column in ('大一成绩', '大二成绩', '加权平均分'):
+                row[column] = parse_score(row[column])
+            yield row
+
+def load_store(path):
+    """读取加权成绩排名表为 RecordStore"""
+    return RecordStore.from_rows(iter_ranking(path))
+
+def lookup(source, student_ids):
+    """
+    查询学号，返回 {学号: 记录或None}
+
+    source 为 data.json，或分片目录（只读取所需的分片）。
+    """
+    source = Path(source)
+    if not source.is_dir():
+        with open(source, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {student_id: data.get(student_id) for student_id in student_ids}
+
+    with open(source / "manifest.json", 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    results = {}
+    shards = {}
+    for student_id in student_ids:
+        prefix = student_id[:manifest['prefix_len']]
+        if prefix not in shards:
+            shard = manifest['shards'].get(prefix)
+            shards[prefix] = {}
+            if shard:
+                with open(source / shard['file'], 'r', encoding='utf-8') as f:
+                    shards[prefix] = json.load(f)
+        results[student_id] = shards[prefix].get(student_id)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="成绩计算核心（不依赖pandas）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rank_parser = subparsers.add_parser("rank", help="计算学分加权成绩并排名")
+    rank_parser.add_argument("year1", help="23-24成绩CSV（无表头）")
+    rank_parser.add_argument("year2", help="24-25成绩CSV")
+    rank_parser.add_argument("--output", default="加权成绩排名.csv", help="完整结果输出路径")
+    rank_parser.add_argument("--simple", default="最终排名.csv", help="简化排名输出路径")
+    rank_parser.add_argument("--json", default=None, help="同时输出 data.json（不含分片和索引）")
+
+    lookup_parser = subparsers.add_parser("lookup", help="按学号查询")
+    lookup_parser.add_argument("source", help="data.json 或分片目录")
+    lookup_parser.add_argument("student_ids", nargs="+", help="学号")
+    args = parser.parse_args()
+
+    if args.command == "rank":
+        year1, year2 = load_scores(args.year1, args.year2)
+        rows = rank_students(year1, year2)
+        write_results(rows, args.output, args.simple)
+        print(f"✅ 已计算 {len(rows)} 名学生的加权成绩: {args.output}")
+        if args.json:
+            RecordStore.from_rows(rows).write_json(args.json)
+            print(f"✅ JSON文件已保存到: {args.json}")
+        return
+
+    for student_id, record in lookup(args.source, args.student_ids).items():
+        if record is None:
+            print(f"❌ {student_id}: 未找到")
+        else:
+            print(f"✅ {student_id}: 排名 {record['排名']}/{record['总人数']}，加权平均分 {record['加权平均分']:.2f}")
+
+if __name__ == "__main__":
+    main()
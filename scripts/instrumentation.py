@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+处理阶段的计时和统计
+
+各处理函数用 @instrument 标记为一个阶段，记录耗时、CPU时间、输入/输出行数和峰值内存；
+进度信息通过 log() 输出。输出方式由环境变量或 configure() 控制:
+
+    GRADE_METRICS=text    默认，打印可读的进度和阶段统计
+    GRADE_METRICS=jsonl   每条进度和阶段统计输出一行JSON
+    GRADE_METRICS=off     不输出任何内容
+    GRADE_METRICS_MEMORY=1  同时跟踪峰值内存（tracemalloc 会使处理明显变慢，默认关闭）
+    GRADE_PROFILE=路径     用 cProfile 分析各顶层阶段，退出时保存最慢阶段的统计
+"""
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_config = {
+    'mode': os.environ.get('GRADE_METRICS', 'text'),
+    'memory': os.environ.get('GRADE_METRICS_MEMORY', '0') == '1',
+    'profile': os.environ.get('GRADE_PROFILE') or None,
+}
+
+# 当前正在执行的阶段（支持嵌套）
+_stack = []
+
+# 最慢顶层阶段的 (耗时, 阶段名, cProfile.Profile)
+_slowest = None
+
+def configure(mode=None, memory=None, profile=None):
+    """修改输出方式；参数为 None 时保持原设置"""
+    if mode is not None:
+        if mode not in ('text', 'jsonl', 'off'):
+            raise ValueError(f"未知的输出方式: {mode}")
+        _config['mode'] = mode
+    if memory is not None:
+        _config['memory'] = memory
+    if profile is not None:
+        _config['profile'] = profile or None
+
+def _emit(event):
+    print(json.dumps(event, ensure_ascii=False), flush=True)
+
+def log(message):
+    """输出进度信息；JSON模式下附带所在阶段"""
+    mode = _config['mode']
+    if mode == 'text':
+        print(message)
+    elif mode == 'jsonl':
+        _emit({
+            'event': 'log',
+            'stage': _stack[-1]['stage'] if _stack else None,
+            'message': message.strip()
+        })
+
+def record_rows(rows_in=None, rows_out=None):
+    """记录当前阶段的输入/输出行数"""
+    if not _stack:
+        return
+    if rows_in is not None:
+        _stack[-1]['rows_in'] = rows_in
+    if rows_out is not None:
+        _stack[-1]['rows_out'] = rows_out
+
+def _format_text(metrics):
+    parts = [f"⏱️  [{metrics['stage']}] {metrics['wall_s']:.3f}s (CPU {metrics['cpu_s']:.3f}s)"]
+    if metrics.get('rows_in') is not None:
+        parts.append(f"输入 {metrics['rows_in']} 行")
+    if metrics.get('rows_out') is not None:
+        parts.append(f"输出 {metrics['rows_out']} 行")
+    if metrics.get('peak_mb') is not None:
+        parts.append(f"峰值内存 {metrics['peak_mb']:.1f}MB")
+    return "，".join(parts)
+
+def _dump_profile():
+    if _slowest is not None and _config['profile']:
+        wall, name, profiler = _slowest
+        profiler.dump_stats(_config['profile'])
+        log(f"📈 最慢阶段 [{name}] ({wall:.3f}s) 的 cProfile 统计已保存到: {_config['profile']}")
+
+atexit.register(_dump_profile)
+
+@contextmanager
+def stage(name):
+    """将一段代码作为一个阶段进行统计"""
+    global _slowest
+    if _config['mode'] == 'off':
+        yield
+        return
+
+    track_memory = _config['memory']
+    # 只有开始跟踪的阶段在结束时停止跟踪，嵌套阶段和外部已开启的跟踪不受影响
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    entry = {'stage': name, 'rows_in': None, 'rows_out': None, 'child_peak': 0}
+    if track_memory:
+        # 嵌套阶段会重置峰值，先把父阶段目前的峰值保存下来
+        current, peak = tracemalloc.get_traced_memory()
+        if _stack:
+            _stack[-1]['child_peak'] = max(_stack[-1]['child_peak'], peak)
+        tracemalloc.reset_peak()
+        entry['memory_start'] = current
+
+    profiler = None
+    if _config['profile'] and not _stack:
+        profiler = cProfile.Profile()
+
+    _stack.append(entry)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        _stack.pop()
+
+        metrics = {
+            'event': 'stage',
+            'stage': name,
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'rows_in': entry['rows_in'],
+            'rows_out': entry['rows_out'],
+        }
+        if track_memory and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], entry['child_peak'])
+            metrics['peak_mb'] = round(max(0, peak - entry['memory_start']) / 2**20, 3)
+            if _stack:
+                _stack[-1]['child_peak'] = max(_stack[-1]['child_peak'], peak)
+        if started_tracing:
+            tracemalloc.stop()
+
+        if profiler is not None and (_slowest is None or wall > _slowest[0]):
+            _slowest = (wall, name, profiler)
+
+        if _config['mode'] == 'jsonl':
+            _emit(metrics)
+        else:
+            print(_format_text(metrics))
+
+def instrument(func):
+    """装饰器：把函数作为以函数名命名的阶段进行统计"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with stage(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
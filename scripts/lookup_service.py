@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地成绩查询服务（仅依赖标准库）
+
+把 data.json 或 加权成绩排名.csv 载入内存索引（学号 → 预先编码好的JSON），
+通过 asyncio 提供HTTP查询接口:
+
+    GET  /students/<学号>          单个查询
+    GET  /students?ids=a,b,c       批量查询
+    POST /students/batch           批量查询，请求体 {"ids": [...]}
+    GET  /health                   数据版本和人数
+
+响应带有基于数据内容哈希的 ETag，支持 If-None-Match 条件请求（304）。
+数据文件变化时在后台重新加载，新索引构建完成后整体替换，查询不会看到半新半旧的数据。
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from grade_core import load_store
+from instrumentation import log
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_IDS = 5000
+
+STATUS_TEXT = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+}
+
+def _encode(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class StudentIndex:
+    """不可变的查询索引：学号 → JSON字节"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        raw = self.path.read_bytes()
+        self.version = hashlib.sha256(raw).hexdigest()[:16]
+        if self.path.suffix == '.csv':
+            self.records = {record['学号']: _encode(record) for record in load_store(self.path)}
+        else:
+            records = json.loads(raw.decode('utf-8'))
+            self.records = {student_id: _encode(record) for student_id, record in records.items()}
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def etag(self):
+        return f'"{self.version}"'
+
+    def batch(self, student_ids):
+        """批量查询，结果直接拼接已编码的记录"""
+        parts = []
+        for student_id in student_ids:
+            record = self.records.get(student_id, b'null')
+            parts.append(_encode(student_id) + b':' + record)
+        return b'{"version":' + _encode(self.version) + b',"results":{' + b','.join(parts) + b'}}'
+
+class LookupService:
+    """查询服务，持有当前索引并负责热加载"""
+
+    def __init__(self, data_file, reload_interval=2.0):
+        self.data_file = Path(data_file)
+        self.reload_interval = reload_interval
+        self.index = StudentIndex(self.data_file)
+        self._stat = self._file_stat()
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    async def watch(self):
+        """轮询数据文件，变化后在线程中构建新索引再整体替换"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            stat = self._file_stat()
+            if stat is None or stat == self._stat:
+                continue
+            try:
+                index = await loop.run_in_executor(None, StudentIndex, self.data_file)
+            except (OSError, ValueError, KeyError) as e:
+                # 文件可能正在写入，保留旧索引，下次轮询再试
+                log(f"⚠️  重新加载失败，继续使用旧数据: {e}")
+                continue
+            self._stat = stat
+            if index.version != self.index.version:
+                self.index = index
+                log(f"🔄 数据已重新加载: {len(index)} 名学生，版本 {index.version}")
+
+    def route(self, method, target, body):
+        """处理一个请求，返回 (状态码, 响应体, ETag或None)"""
+        index = self.index
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip('/')
+
+        if path == '/health':
+            return 200, _encode({"version": index.version, "total": len(index)}), None
+
+        if path == '/students/batch':
+            if method != 'POST':
+                return 405, _encode({"error": "请使用POST"}), None
+            try:
+                ids = json.loads(body.decode('utf-8'))['ids']
+            except (ValueError, KeyError, TypeError):
+                return 400, _encode({"error": "请求体应为 {\"ids\": [...]}"}), None
+            if not isinstance(ids, list) or len(ids) > MAX_BATCH_IDS:
+                return 400, _encode({"error": f"ids 应为不超过 {MAX_BATCH_IDS} 个学号的列表"}), None
+            return 200, index.batch([str(student_id) for student_id in ids]), index.etag
+
+        # HEAD 与 GET 相同处理，只是不发送响应体
+        if method not in ('GET', 'HEAD'):
+            return 405, _encode({"error": "请使用GET"}), None
+
+        if path == '/students':
+            ids = [student_id for value in parse_qs(url.query).get('ids', [])
+                   for student_id in value.split(',') if student_id]
+            if not ids or len(ids) > MAX_BATCH_IDS:
+                return 400, _encode({"error": f"ids 应包含 1 到 {MAX_BATCH_IDS} 个学号"}), None
+            return 200, index.batch(ids), index.etag
+
+        if path.startswith('/students/'):
+            record = index.records.get(path[len('/students/'):])
+            if record is None:
+                return 404, _encode({"error": "未找到该学号"}), index.etag
+            return 200, record, index.etag
+
+        return 404, _encode({"error": "未知路径"}), None
+
+    async def handle(self, reader, writer):
+        """处理一个连接上的请求（支持 keep-alive）"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 413, _encode({"error": "请求头过大"}), None, False)
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, 400, _encode({"error": "请求格式错误"}), None, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                length = headers.get('content-length', '') or '0'
+                if not (length.isascii() and length.isdigit()):
+                    await self._respond(writer, 400, _encode({"error": "Content-Length 无效"}), None, False)
+                    break
+                length = int(length)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, _encode({"error": "请求体过大"}), None, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+                status, payload, etag = self.route(method.upper(), target, body)
+                if status == 200 and etag and etag in headers.get('if-none-match', ''):
+                    status, payload = 304, b''
+                await self._respond(writer, status, payload, etag, keep_alive,
+                                    head_only=method.upper() == 'HEAD')
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, etag, keep_alive, head_only=False):
+        headers = [
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(payload)}",
+            "Access-Control-Allow-Origin: *",
+            "Cache-Control: no-cache",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if etag:
+            headers.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1'))
+        if not head_only:
+            writer.write(payload)
+        await writer.drain()
+
+async def serve(data_file, host='127.0.0.1', port=8000, reload_interval=2.0):
+    service = LookupService(data_file, reload_interval)
+    server = await asyncio.start_server(service.handle, host, port, limit=MAX_HEADER_BYTES)
+    log(f"✅ 已加载 {len(service.index)} 名学生（版本 {service.index.version}）")
+    log(f"🚀 查询服务已启动: http://{host}:{port}/students/<学号>")
+    watcher = asyncio.create_task(service.watch())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description="本地成绩查询服务")
+    parser.add_argument("--data", default="build/data.json", help="data.json 或 加权成绩排名.csv（默认读取 convert_csv_to_json 的输出）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口")
+    parser.add_argument("--reload-interval", type=float, default=2.0, help="检查数据文件变化的间隔（秒）")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.data, args.host, args.port, args.reload_interval))
+    except KeyboardInterrupt:
+        log("\n👋 查询服务已停止")
+
+if __name__ == "__main__":
+    main()
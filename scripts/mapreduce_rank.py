@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Map-Reduce 方式的学分加权排名
+
+按学号范围把输入切分为若干分区，各分区的连接、加权计算和局部排序由独立的工作进程完成，
+协调者把所有有序段多路归并为全局名次，写出排名CSV和（可选的）data.json / 分片 / 排名索引。
+结果与单进程计算逐字节相同：归并使用与 external_rank 相同的全局排序键（含同分顺序）。
+
+工作目录中的文件即各步骤之间的全部状态，工作进程可以是本机进程，也可以是共享该目录的其他机器:
+    split    读取两个学年的成绩，抽样确定学号范围的分界，写出分区文件和任务描述 job.json
+    map      处理一个分区，写出有序段和完成标记 map-<分区>.json（各分区互不依赖，可在不同机器上执行）
+    reduce   确认全部分区已完成后归并有序段，写出结果
+    run      在本机依次完成以上三步，map 在进程池中并行
+
+用法:
+    python mapreduce_rank.py run 23-24_neo.csv 24-25.csv --workers 8 --json data.json --shard-dir shards
+    python mapreduce_rank.py split 23-24_neo.csv 24-25.csv --work-dir /shared/job --partitions 32
+    python mapreduce_rank.py map --work-dir /shared/job --partition 5       # 每个分区执行一次
+    python mapreduce_rank.py reduce --work-dir /shared/job --output 加权成绩排名.csv
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from convert_csv_to_json import DEFAULT_PREFIX_LEN, convert_csv_to_json
+from external_rank import DEFAULT_CHUNK_ROWS, DEFAULT_MAX_FAN_IN, join_partitions, merge_runs, spill_partitions
+from grade_core import YEAR_CREDITS, iter_rows, write_results
+from instrumentation import instrument, log, record_rows
+
+JOB_FILE = "job.json"
+DEFAULT_PARTITIONS = 8
+# 确定分界时抽样的学号数
+SAMPLE_SIZE = 10_000
+
+def _sample_ids(file_24_25, size=SAMPLE_SIZE, seed=0):
+    """蓄水池抽样大二名单中的学号，固定随机种子使分界可复现"""
+    rng = random.Random(seed)
+    sample = []
+    for count, row in enumerate(iter_rows(file_24_25)):
+        if count < size:
+            sample.append(row['学号'])
+        else:
+            index = rng.randrange(count + 1)
+            if index < size:
+                sample[index] = row['学号']
+    return sample
+
+def range_boundaries(student_ids, partitions):
+    """
+    把学号（按字符串顺序）大致均分为 partitions 个范围，返回 partitions-1 个分界
+
+    学号为 分界[i-1] <= 学号 < 分界[i] 的记录属于第 i 个分区；学号较少时分区数相应减少。
+    """
+    ordered = sorted(set(student_ids))
+    boundaries = []
+    for i in range(1, partitions):
+        boundary = ordered[len(ordered) * i // partitions] if ordered else None
+        if boundary is not None and (not boundaries or boundary > boundaries[-1]):
+            boundaries.append(boundary)
+    return boundaries
+
+def _load_job(work_dir):
+    with open(Path(work_dir) / JOB_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _map_marker(work_dir, partition):
+    return Path(work_dir) / f"map-{partition}.json"
+
+@instrument
+def split(file_23_24, file_24_25, work_dir, partitions=DEFAULT_PARTITIONS, credits=YEAR_CREDITS,
+          chunk_rows=DEFAULT_CHUNK_ROWS):
+    """按学号范围切分输入，写出分区文件和 job.json，返回任务描述"""
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    # 清除上一次任务的有序段、中间归并段和完成标记，避免被当作本次的结果
+    for path in [*work_dir.glob("run-*.csv"), *work_dir.glob("merge*-run-*.csv"), *work_dir.glob("map-*.json")]:
+        path.unlink()
+
+    boundaries = range_boundaries(_sample_ids(file_24_25), partitions)
+    count = len(boundaries) + 1
+    year1_files, year2_files, rows_in = spill_partitions(
+        file_23_24, file_24_25, work_dir, count,
+        partition_of=lambda student_id: bisect_right(boundaries, student_id))
+
+    job = {
+        "partitions": count,
+        "boundaries": boundaries,
+        "credits": credits,
+        "chunk_rows": chunk_rows,
+        "year1_files": [path.name for path in year1_files],
+        "year2_files": [path.name for path in year2_files],
+    }
+    with open(work_dir / JOB_FILE, 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False, indent=2)
+    record_rows(rows_in=rows_in, rows_out=count)
+    log(f"✂️  按学号范围切分为 {count} 个分区: {work_dir}")
+    return job
+
+def map_partition(work_dir, partition):
+    """
+    处理一个分区：连接、计算加权平均分并写出有序段，最后写完成标记
+
+    重复执行同一分区会覆盖之前的结果，失败的分区可以直接重试。
+    """
+    work_dir = Path(work_dir)
+    job = _load_job(work_dir)
+    run_files, total = join_partitions([work_dir / job["year1_files"][partition]],
+                                       [work_dir / job["year2_files"][partition]],
+                                       work_dir, job["credits"], job["chunk_rows"], run_name=f"run-{partition}")
+
+    # 先写临时文件再改名，reduce 看到标记时有序段一定已写完
+    marker = _map_marker(work_dir, partition)
+    tmp_marker = marker.with_name(marker.name + '.tmp')
+    with open(tmp_marker, 'w', encoding='utf-8') as f:
+        json.dump({"runs": [path.name for path in run_files], "total": total}, f, ensure_ascii=False)
+    os.replace(tmp_marker, marker)
+    return total
+
+@instrument
+def reduce(work_dir, output_file="加权成绩排名.csv", simple_file="最终排名.csv", json_file=None,
+           shard_dir=None, prefix_len=DEFAULT_PREFIX_LEN, rank_index_file=None, max_fan_in=DEFAULT_MAX_FAN_IN):
+    """
+    归并全部分区的有序段为全局排名并写出结果
+
+    json_file 不为空时再由排名表生成 data.json（以及 shard_dir 分片、rank_index_file 索引），
+    与单进程的 convert_csv_to_json 输出相同。有序段多于 max_fan_in 个时分多轮归并，
+    map 写出的有序段保留不删，reduce 失败后可以直接重试。有分区尚未完成时返回 None。
+    """
+    work_dir = Path(work_dir)
+    job = _load_job(work_dir)
+    markers = [_map_marker(work_dir, partition) for partition in range(job["partitions"])]
+    unfinished = [str(partition) for partition, marker in enumerate(markers) if not marker.exists()]
+    if unfinished:
+        log(f"❌ 以下分区尚未完成 map: {', '.join(unfinished)}")
+        return None
+
+    run_files = []
+    total = 0
+    for marker in markers:
+        with open(marker, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        run_files.extend(work_dir / name for name in result["runs"])
+        total += result["total"]
+
+    log(f"🔀 归并 {job['partitions']} 个分区的 {len(run_files)} 个有序段，共 {total} 名学生")
+    result = write_results(merge_runs(run_files, total, max_fan_in, keep_inputs=True), output_file, simple_file)
+    record_rows(rows_in=total, rows_out=total)
+    log(f"✅ 完整结果已保存到: {output_file}")
+    log(f"✅ 简化排名已保存到: {simple_file}")
+
+    if json_file:
+        convert_csv_to_json(output_file, json_file, shard_dir, prefix_len, rank_index_file=rank_index_file)
+    return result
+
+def rank_map_reduce(file_23_24, file_24_25, output_file="加权成绩排名.csv", simple_file="最终排名.csv",
+                    credits=YEAR_CREDITS, partitions=DEFAULT_PARTITIONS, workers=None,
+                    chunk_rows=DEFAULT_CHUNK_ROWS, work_dir=None, **outputs):
+    """
+    在本机完成 split / map / reduce，map 阶段在 workers 个进程中并行
+
+    未指定 work_dir 时使用临时目录并在完成后删除；outputs 传给 reduce（json_file、shard_dir 等）。
+    """
+    tmp = None
+    if work_dir is None:
+        tmp = work_dir = tempfile.mkdtemp(prefix="mapreduce_rank-")
+    try:
+        job = split(file_23_24, file_24_25, work_dir, partitions, credits, chunk_rows)
+        count = job["partitions"]
+        workers = min(workers or os.cpu_count(), count)
+        log(f"🚀 使用 {workers} 个进程处理 {count} 个分区")
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(map_partition, [work_dir] * count, range(count)))
+        else:
+            for partition in range(count):
+                map_partition(work_dir, partition)
+        return reduce(work_dir, output_file, simple_file, **outputs)
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Map-Reduce 方式的学分加权排名（多进程或多机器）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="在本机用进程池完成全部步骤")
+    split_parser = subparsers.add_parser("split", help="按学号范围切分输入")
+    for sub in (run_parser, split_parser):
+        sub.add_argument("year1", help="23-24成绩CSV（无表头）")
+        sub.add_argument("year2", help="24-25成绩CSV")
+        sub.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS, help="学号范围分区数")
+        sub.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="每个有序段的记录数")
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="map 阶段的进程数")
+
+    map_parser = subparsers.add_parser("map", help="处理一个分区")
+    map_parser.add_argument("--partition", type=int, required=True, help="分区序号（从0开始）")
+
+    reduce_parser = subparsers.add_parser("reduce", help="归并全部分区并写出结果")
+    for sub in (run_parser, reduce_parser):
+        sub.add_argument("--output", default="加权成绩排名.csv", help="完整结果输出路径")
+        sub.add_argument("--simple", default="最终排名.csv", help="简化排名输出路径")
+        sub.add_argument("--json", default=None, help="同时输出 data.json")
+        sub.add_argument("--shard-dir", default=None, help="同时输出分片（需要 --json）")
+        sub.add_argument("--prefix-len", type=int, default=DEFAULT_PREFIX_LEN, help="分片学号前缀长度")
+        sub.add_argument("--rank-index", default=None, help="同时输出排名索引（需要 --json）")
+        sub.add_argument("--max-fan-in", type=int, default=DEFAULT_MAX_FAN_IN,
+                         help="归并时最多同时打开的有序段数，超过时分多轮归并")
+
+    for sub in (run_parser, split_parser, map_parser, reduce_parser):
+        sub.add_argument("--work-dir", default=None if sub is run_parser else "mapreduce_job",
+                         help="共享工作目录（run 默认使用临时目录）")
+    args = parser.parse_args()
+
+    if args.command == "split":
+        split(args.year1, args.year2, args.work_dir, args.partitions, chunk_rows=args.chunk_rows)
+    elif args.command == "map":
+        total = map_partition(args.work_dir, args.partition)
+        log(f"✅ 分区 {args.partition} 完成，{total} 名学生")
+    else:
+        outputs = dict(json_file=args.json, shard_dir=args.shard_dir, prefix_len=args.prefix_len,
+                       rank_index_file=args.rank_index, max_fan_in=args.max_fan_in)
+        if args.command == "reduce":
+            reduce(args.work_dir, args.output, args.simple, **outputs)
+        else:
+            rank_map_reduce(args.year1, args.year2, args.output, args.simple, partitions=args.partitions,
+                            workers=args.workers, chunk_rows=args.chunk_rows, work_dir=args.work_dir,
+                            **outputs)
+
+if __name__ == "__main__":
+    main()
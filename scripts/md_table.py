@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown表格的流式解析
+
+逐行读取 | 学号 | 课程成绩 | 形式的表格，按表头名称定位各列（列的顺序和多余的列不影响解析），
+每行转换为带类型的记录后立即产出，不需要把整个文件读入内存。
+无法解析的行不会中断解析，连同行号和原因记录在调用方传入的 errors 列表中。
+
+供 convert_md_to_csv.py 和 compare_md_csv.py 共用。
+"""
+
+import re
+from collections import namedtuple
+
+from fixed_point import to_hundredths
+from instrumentation import log
+
+BadRow = namedtuple('BadRow', ['line_num', 'line', 'reason'])
+
+# 表头下方的分隔行，如 | --- | :---: |
+SEPARATOR = re.compile(r'^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$')
+
+def parse_student_id(value):
+    """学号应为纯数字"""
+    if not value.isdigit():
+        raise ValueError(f"学号格式不正确: {value!r}")
+    return value
+
+def parse_score(value):
+    """成绩应为有限的数字，返回百分之一分的整数（见 fixed_point）"""
+    score = to_hundredths(value)
+    if score is None:
+        raise ValueError(f"成绩格式不正确: {value!r}")
+    return score
+
+# 默认读取的列：{表头名称: 类型转换函数}
+DEFAULT_COLUMNS = {
+    '学号': parse_student_id,
+    '课程成绩': parse_score,
+}
+
+def _split_cells(line):
+    """拆分以 | 开头的表格行为单元格（行尾的 | 可省略）"""
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|'):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split('|')]
+
+def iter_md_table(md_file, columns=DEFAULT_COLUMNS, errors=None):
+    """
+    逐行解析Markdown表格，产出 {列名: 值, '行号': 行号} 的记录
+
+    columns 为 {表头名称: 类型转换函数}，转换函数对非法值抛出 ValueError。
+    以 | 开头的行视为表格行，第一行表格行视为表头，之后与表头相同的行（如分段粘贴时重复的表头）会被跳过；
+    其余的行一律忽略（省略了行首 | 的表格行也不解析）。表头缺少所需的列时抛出 ValueError。
+    errors 为列表时，无法解析的行以 BadRow 追加到其中。
+    """
+    header = None
+    positions = {}
+    with open(md_file, 'r', encoding='utf-8-sig') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line.startswith('|') or SEPARATOR.match(line):
+                continue
+
+            cells = _split_cells(line)
+            if header is None:
+                missing = [name for name in columns if name not in cells]
+                if missing:
+                    raise ValueError(f"第{line_num}行表头缺少列: {', '.join(missing)}")
+                header = cells
+                positions = {name: cells.index(name) for name in columns}
+                continue
+            if cells == header:
+                continue
+
+            try:
+                if len(cells) != len(header):
+                    raise ValueError(f"有 {len(cells)} 列，表头为 {len(header)} 列")
+                record = {name: convert(cells[positions[name]]) for name, convert in columns.items()}
+            except ValueError as e:
+                if errors is not None:
+                    errors.append(BadRow(line_num, line, str(e)))
+                continue
+
+            record['行号'] = line_num
+            yield record
+
+def log_bad_rows(errors, limit=20):
+    """输出无法解析的行（最多 limit 行）"""
+    if not errors:
+        return
+    log(f"⚠️  有 {len(errors)} 行无法解析，已跳过:")
+    for bad in errors[:limit]:
+        log(f"  - 第{bad.line_num}行: {bad.reason} ({bad.line})")
+    if len(errors) > limit:
+        log(f"  ... 还有 {len(errors) - limit} 行")
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+成绩数据处理流水线
+
+按依赖顺序执行 md→csv、23-24学号筛选、学分加权计算、csv→json、分布统计、生成发布包六个阶段，
+中间产物统一写入输出目录。每个阶段记录输入文件和配置（如学分）的内容哈希，
+重新运行时只执行输入或配置发生变化的阶段及其受影响的下游阶段。
+
+--format feather 时阶段之间传递带类型的 Arrow 文件（需要 pyarrow），
+加权成绩排名.csv / 最终排名.csv 仍然输出，供人查看。
+--engine core 时学分加权阶段使用不依赖 pandas 的 grade_core 实现（小规模数据更快），
+--engine external 时使用外存排名（external_rank），内存占用与数据规模无关；
+--engine mapreduce 时按学号范围分区，在进程池中并行计算后归并（mapreduce_rank）；
+--engine sqlite 时把两个学年的成绩增量载入输出目录下的 grades.db，用索引连接查询排名（registry）。
+--baseline 指定上次发布的数据时，额外执行 delta 阶段，输出只含变化记录的增量补丁和变更报告。
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# md→csv 转换脚本位于 raw_data/24-25/ 下
+sys.path.insert(0, str(REPO_ROOT / "raw_data" / "24-25"))
+
+from convert_md_to_csv import convert_md_to_csv
+from filter_23_24 import filter_csv_by_intersection
+import calculate_weighted_grades as weighted
+import grade_core
+from external_rank import rank_out_of_core
+from mapreduce_rank import rank_map_reduce
+import registry
+from convert_csv_to_json import convert_csv_to_json, DEFAULT_PREFIX_LEN
+from artifacts import columnar_available
+from distribution import build_sketches, write_distribution
+from publish import publish
+from delta import write_delta
+import instrumentation
+from instrumentation import log, stage as instrumented_stage
+
+# 默认原始输入
+DEFAULT_MD_FILE = REPO_ROOT / "raw_data" / "24-25" / "24-25排名.md"
+DEFAULT_23_24_FILE = REPO_ROOT / "raw_data" / "23-24" / "23-24.csv"
+
+STATE_FILE = ".pipeline_state.json"
+
+# 中间产物格式对应的文件后缀
+FORMAT_SUFFIXES = {
+    'csv': '.csv',
+    'feather': '.feather',
+}
+
+# 阶段实现变化时递增，使已有缓存失效
+PIPELINE_VERSION = 2
+
+def _run_md_to_csv(paths, config):
+    return convert_md_to_csv(paths['md'], paths['24-25'])
+
+def _run_filter(paths, config):
+    return filter_csv_by_intersection(paths['23-24'], paths['24-25'], paths['23-24_neo'])
+
+def _run_weighted(paths, config):
+    if config['engine'] == 'core':
+        year1, year2 = grade_core.load_scores(paths['23-24_neo'], paths['24-25'])
+        rows = grade_core.rank_students(year1, year2, config['credits'])
+        return grade_core.write_results(rows, paths['ranking'], paths['simple_ranking'])
+    if config['engine'] == 'external':
+        return rank_out_of_core(paths['23-24_neo'], paths['24-25'], paths['ranking'], paths['simple_ranking'],
+                                config['credits'], work_dir=paths['ranking'].parent)
+    if config['engine'] == 'sqlite':
+        conn = registry.sync_years(paths['registry'], paths['23-24_neo'], paths['24-25'])
+        try:
+            return registry.rank_to_csv(conn, paths['ranking'], paths['simple_ranking'],
+                                        credits=config['credits'])
+        finally:
+            conn.close()
+    if config['engine'] == 'mapreduce':
+        return rank_map_reduce(paths['23-24_neo'], paths['24-25'], paths['ranking'], paths['simple_ranking'],
+                               config['credits'])
+    df_year1, df_year2 = weighted.load_data(paths['23-24_neo'], paths['24-25'])
+    if df_year1 is None or df_year2 is None:
+        return None
+    df_results = weighted.calculate_weighted_grades(df_year1, df_year2)
+    return weighted.save_results(df_results, paths['ranking'], paths['simple_ranking'],
+                                 artifact_file=paths['ranking_table'])
+
+def _run_json(paths, config):
+    return convert_csv_to_json(paths['ranking_table'], paths['data_json'], paths['shards'], config['prefix_len'],
+                               rank_index_file=paths['rank_index'])
+
+def _run_distribution(paths, config):
+    return write_distribution(build_sketches([paths['ranking']]), paths['distribution'])
+
+def _run_publish(paths, config):
+    return publish(paths['shards'], paths['rank_index'], paths['bundle'],
+                   distribution_file=paths['distribution'])
+
+def _run_delta(paths, config):
+    return write_delta(paths['baseline'], paths['shards'], paths['delta'], config['prefix_len'])
+
+# 阶段定义：inputs/outputs 为 paths 中的键，config 为影响该阶段结果的配置键
+STAGES = [
+    {
+        'name': 'md_to_csv',
+        'inputs': ['md'],
+        'outputs': ['24-25'],
+        'config': [],
+        'run': _run_md_to_csv
+    },
+    {
+        'name': 'filter_23_24',
+        'inputs': ['23-24', '24-25'],
+        'outputs': ['23-24_neo'],
+        'config': [],
+        'run': _run_filter
+    },
+    {
+        'name': 'weighted_grades',
+        'inputs': ['23-24_neo', '24-25'],
+        'outputs': ['ranking', 'simple_ranking', 'ranking_table'],
+        'config': ['credits', 'engine'],
+        'run': _run_weighted
+    },
+    {
+        'name': 'csv_to_json',
+        'inputs': ['ranking_table'],
+        'outputs': ['data_json', 'shards', 'rank_index'],
+        'config': ['prefix_len'],
+        'run': _run_json
+    },
+    {
+        'name': 'distribution',
+        'inputs': ['ranking'],
+        'outputs': ['distribution'],
+        'config': [],
+        'run': _run_distribution
+    },
+    {
+        'name': 'publish',
+        'inputs': ['shards', 'rank_index', 'distribution'],
+        'outputs': ['bundle'],
+        'config': [],
+        'run': _run_publish
+    },
+]
+
+# 指定 baseline 时追加的增量发布阶段
+DELTA_STAGE = {
+    'name': 'delta',
+    'inputs': ['baseline', 'shards'],
+    'outputs': ['delta'],
+    'config': ['prefix_len'],
+    'run': _run_delta
+}
+
+def build_paths(output_dir, md_file=DEFAULT_MD_FILE, file_23_24=DEFAULT_23_24_FILE, fmt='csv'):
+    """原始输入和各阶段产物的路径，fmt 决定阶段之间传递的中间产物格式"""
+    output_dir = Path(output_dir)
+    suffix = FORMAT_SUFFIXES[fmt]
+    return {
+        'md': Path(md_file),
+        '23-24': Path(file_23_24),
+        '24-25': output_dir / f"24-25{suffix}",
+        '23-24_neo': output_dir / f"23-24_neo{suffix}",
+        'ranking': output_dir / "加权成绩排名.csv",
+        'ranking_table': output_dir / f"加权成绩排名{suffix}",
+        'simple_ranking': output_dir / "最终排名.csv",
+        'data_json': output_dir / "data.json",
+        'shards': output_dir / "shards",
+        'rank_index': output_dir / "rank_index.json",
+        'distribution': output_dir / "distribution.json",
+        'bundle': output_dir / "bundle",
+        'registry': output_dir / "grades.db",
+        'delta': output_dir / "delta",
+    }
+
+def hash_path(path):
+    """计算文件或目录内容的SHA-256，不存在时返回 None"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+    for file in files:
+        digest.update(str(file.relative_to(path) if path.is_dir() else file.name).encode('utf-8'))
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def stage_key(stage, paths, config):
+    """阶段输入内容、配置和流水线版本共同决定的缓存键"""
+    digest = hashlib.sha256()
+    digest.update(f"{stage['name']}:{PIPELINE_VERSION}".encode('utf-8'))
+    for name in stage['inputs']:
+        digest.update(f"{name}={hash_path(paths[name])}".encode('utf-8'))
+    stage_config = {name: config[name] for name in stage['config']}
+    digest.update(json.dumps(stage_config, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def load_state(output_dir):
+    state_file = Path(output_dir) / STATE_FILE
+    if state_file.exists():
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_state(output_dir, state):
+    with open(Path(output_dir) / STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+def run_pipeline(output_dir="build", md_file=DEFAULT_MD_FILE, file_23_24=DEFAULT_23_24_FILE,
+                 prefix_len=DEFAULT_PREFIX_LEN, force=False, fmt='csv', engine='pandas', baseline=None):
+    """
+    运行流水线，返回本次实际执行的阶段名列表
+
+    baseline 为上次发布的 data.json、分片目录或发布包目录时，最后与其比较生成增量补丁。
+    阶段的缓存键（输入内容+配置）未变且上次产物未被改动时跳过该阶段；
+    force 为 True 时全部重新执行。任一阶段失败则停止，返回 None。
+    """
+    if fmt != 'csv' and not columnar_available():
+        log(f"❌ 中间产物格式 {fmt} 需要pyarrow，请安装: pip install pyarrow")
+        return None
+    if engine != 'pandas' and fmt != 'csv':
+        log(f"❌ --engine {engine} 只支持CSV中间产物")
+        return None
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = build_paths(output_dir, md_file, file_23_24, fmt)
+    stages = STAGES
+    if baseline:
+        paths['baseline'] = Path(baseline)
+        stages = STAGES + [DELTA_STAGE]
+    config = {
+        'credits': weighted.YEAR_CREDITS,
+        'engine': engine,
+        'prefix_len': prefix_len
+    }
+    state = load_state(output_dir)
+    executed = []
+
+    for stage in stages:
+        name = stage['name']
+        key = stage_key(stage, paths, config)
+        previous = state.get(name, {})
+        outputs_intact = all(
+            previous.get('outputs', {}).get(output) == hash_path(paths[output])
+            for output in stage['outputs']
+        )
+
+        if not force and previous.get('key') == key and outputs_intact:
+            log(f"⏭️  [{name}] 输入未变化，跳过")
+            continue
+
+        log(f"\n▶️  [{name}] 开始执行")
+        with instrumented_stage(name):
+            result = stage['run'](paths, config)
+        output_hashes = {output: hash_path(paths[output]) for output in stage['outputs']}
+        if result is None or None in output_hashes.values():
+            log(f"❌ [{name}] 执行失败，流水线终止")
+            save_state(output_dir, state)
+            return None
+
+        state[name] = {'key': key, 'outputs': output_hashes}
+        save_state(output_dir, state)
+        executed.append(name)
+
+    log(f"\n🎉 流水线完成，执行了 {len(executed)}/{len(stages)} 个阶段，产物目录: {output_dir}")
+    return executed
+
+def main():
+    parser = argparse.ArgumentParser(description="运行成绩数据处理流水线（未变化的阶段自动跳过）")
+    parser.add_argument("--output-dir", default="build", help="中间产物和结果的输出目录")
+    parser.add_argument("--md", default=str(DEFAULT_MD_FILE), help="24-25学年成绩Markdown表格")
+    parser.add_argument("--year1", default=str(DEFAULT_23_24_FILE), help="23-24学年成绩CSV（全集）")
+    parser.add_argument("--prefix-len", type=int, default=DEFAULT_PREFIX_LEN, help="JSON分片学号前缀长度")
+    parser.add_argument("--force", action="store_true", help="忽略缓存，重新执行所有阶段")
+    parser.add_argument("--format", choices=sorted(FORMAT_SUFFIXES), default='csv',
+                        help="阶段之间传递的中间产物格式（feather 需要 pyarrow）")
+    parser.add_argument("--engine", choices=['pandas', 'core', 'external', 'mapreduce', 'sqlite'],
+                        default='pandas',
+                        help="学分加权阶段的实现（core 不依赖pandas，适合小规模数据；external 为外存排名；"
+                             "mapreduce 为多进程并行；sqlite 为增量载入的成绩库）")
+    parser.add_argument("--baseline", default=None,
+                        help="上次发布的 data.json、分片目录或发布包目录，指定时输出增量补丁")
+    parser.add_argument("--metrics", choices=['text', 'jsonl', 'off'], default=None,
+                        help="进度和阶段统计的输出方式（默认取环境变量 GRADE_METRICS）")
+    parser.add_argument("--memory", action="store_true",
+                        help="同时统计各阶段峰值内存（会使处理明显变慢，--metrics jsonl 时自动开启）")
+    parser.add_argument("--profile", default=None, help="保存最慢阶段的 cProfile 统计到该文件")
+    args = parser.parse_args()
+
+    instrumentation.configure(mode=args.metrics, profile=args.profile,
+                              memory=True if args.memory or args.metrics == 'jsonl' else None)
+
+    run_pipeline(args.output_dir, args.md, args.year1, args.prefix_len, args.force, args.format, args.engine,
+                 args.baseline)
+
+if __name__ == "__main__":
+    main()
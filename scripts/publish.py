@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成静态网站的发布包
+
+把 convert_csv_to_json 的产物（分片、排名索引、完整数据）和 distribution 的分布摘要压缩为紧凑JSON，
+以内容哈希命名（如 20232112.3f9a0c1b2d4e.json），并预先生成 .gz 和 .br 压缩版本，
+最后写出清单 bundle.json 供 script.js 读取。
+
+带哈希的文件内容永不改变，浏览器和CDN可以永久缓存；成绩更新后只有内容变化的文件
+换了新文件名，只有 bundle.json 需要每次重新验证。
+旧文件默认保留；--prune 时删除当前和上一版清单都不再引用的旧版本（仍持有上一版 bundle.json 的
+客户端在部署期间不会遇到404），且只删除符合 <名称>.<哈希>.json[.gz|.br] 命名的文件。
+brotli 为可选依赖，未安装时只生成 .gz。
+
+用法:
+    python publish.py --shard-dir ../build/shards --rank-index ../build/rank_index.json --output-dir ../data/bundle --prune
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from instrumentation import instrument, log, record_rows
+
+MANIFEST_FILE = "bundle.json"
+HASH_LEN = 12
+# write_artifact 生成的文件名，只有这类文件可能被清理
+ARTIFACT_NAME = re.compile(r'[^.]+\.[0-9a-f]{%d}\.json(\.gz|\.br)?' % HASH_LEN)
+
+def minify(obj):
+    """紧凑JSON（无缩进和多余空格）"""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _write_if_changed(path, content):
+    """内容相同的文件不重写，保留修改时间"""
+    if path.exists() and path.read_bytes() == content:
+        return False
+    tmp_file = path.with_name(path.name + '.tmp')
+    tmp_file.write_bytes(content)
+    os.replace(tmp_file, path)
+    return True
+
+def write_artifact(obj, stem, output_dir):
+    """
+    写出一个内容哈希命名的JSON文件及其压缩版本，返回 (文件名, 各版本大小)
+
+    gzip 固定 mtime=0，相同内容得到相同的压缩文件。
+    """
+    content = minify(obj)
+    name = f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LEN]}.json"
+    sizes = {'json': len(content)}
+
+    variants = [(name, content), (name + '.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((name + '.br', brotli.compress(content, quality=11)))
+    for file_name, data in variants:
+        _write_if_changed(output_dir / file_name, data)
+        sizes[file_name.rsplit('.', 1)[-1]] = len(data)
+
+    return name, sizes
+
+def _referenced_files(manifest):
+    """清单引用的全部文件名（含压缩版本）"""
+    names = [shard["file"] for shard in manifest.get("shards", {}).values()]
+    names += [manifest[key] for key in ("rank_index", "distribution", "data") if key in manifest]
+    return {variant for name in names for variant in (name, name + '.gz', name + '.br')}
+
+@instrument
+def publish(shard_dir="build/shards", rank_index_file="build/rank_index.json", output_dir="data/bundle",
+            data_file=None, distribution_file=None, prune=False):
+    """
+    生成发布包，返回清单文件路径
+
+    data_file 为完整 data.json 路径时一并发布（供下载或查询服务使用）；
+    distribution_file 为分布摘要时一并发布（供网页显示分位区间）。
+    prune 为真时删除当前和上一版清单都不再引用的旧版本（只删除内容哈希命名的文件）。
+    """
+    shard_dir = Path(shard_dir)
+    output_dir = Path(output_dir)
+    shard_manifest_file = shard_dir / "manifest.json"
+    if not shard_manifest_file.exists():
+        log(f"❌ 分片清单不存在: {shard_manifest_file}")
+        return None
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if brotli is None:
+        log("⚠️  未安装brotli，只生成gzip压缩版本（pip install brotli）")
+
+    with open(shard_manifest_file, 'r', encoding='utf-8') as f:
+        shard_manifest = json.load(f)
+
+    manifest = {
+        "prefix_len": shard_manifest["prefix_len"],
+        "total": shard_manifest["total"],
+        "shards": {}
+    }
+    totals = {}
+
+    def add_sizes(sizes):
+        for kind, size in sizes.items():
+            totals[kind] = totals.get(kind, 0) + size
+
+    for prefix, shard in shard_manifest["shards"].items():
+        with open(shard_dir / shard["file"], 'r', encoding='utf-8') as f:
+            name, sizes = write_artifact(json.load(f), prefix, output_dir)
+        manifest["shards"][prefix] = {"file": name, "count": shard["count"]}
+        add_sizes(sizes)
+
+    artifacts = ("rank_index", "distribution", "data")
+    for key, source in zip(artifacts, (rank_index_file, distribution_file, data_file)):
+        if not source:
+            continue
+        with open(source, 'r', encoding='utf-8') as f:
+            name, sizes = write_artifact(json.load(f), Path(source).stem, output_dir)
+        manifest[key] = name
+        add_sizes(sizes)
+
+    manifest_file = output_dir / MANIFEST_FILE
+    removed = 0
+    if prune:
+        # 保留上一版清单引用的文件，部署期间仍使用旧 bundle.json 的客户端不受影响
+        referenced = _referenced_files(manifest)
+        if manifest_file.exists():
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                referenced |= _referenced_files(json.load(f))
+        for path in output_dir.iterdir():
+            if path.is_file() and ARTIFACT_NAME.fullmatch(path.name) and path.name not in referenced:
+                path.unlink()
+                removed += 1
+
+    _write_if_changed(manifest_file, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    record_rows(rows_in=len(shard_manifest["shards"]), rows_out=len(manifest["shards"]))
+
+    log(f"✅ 发布包已生成: {output_dir} ({len(manifest['shards'])} 个分片，清理了 {removed} 个旧文件)")
+    log(f"📦 JSON {totals.get('json', 0) / 1024:.1f}KB，gzip {totals.get('gz', 0) / 1024:.1f}KB"
+        + (f"，brotli {totals['br'] / 1024:.1f}KB" if 'br' in totals else ""))
+
+    return manifest_file
+
+def main():
+    parser = argparse.ArgumentParser(description="生成内容哈希命名、预压缩的静态网站发布包")
+    parser.add_argument("--shard-dir", default="build/shards", help="convert_csv_to_json 输出的分片目录")
+    parser.add_argument("--rank-index", default="build/rank_index.json", help="分数-排名索引")
+    parser.add_argument("--distribution", default=None, help="同时发布 distribution.py 生成的分布摘要")
+    parser.add_argument("--data", default=None, help="同时发布完整的 data.json")
+    parser.add_argument("--output-dir", default="data/bundle", help="发布包输出目录")
+    parser.add_argument("--prune", action="store_true",
+                        help="删除当前和上一版清单都不再引用的旧文件（默认保留）")
+    args = parser.parse_args()
+
+    publish(args.shard_dir, args.rank_index, args.output_dir, args.data, args.distribution, args.prune)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分数-排名索引
+
+保存按升序排列的全部加权平均分（以百分之一分为单位的整数），
+用二分查找回答“某个分数能排第几”“第N名是多少分”“超过了百分之几的同学”，
+无需重新排序全部记录。索引可序列化为 rank_index.json 供前端使用。
+
+排名语义与 calculate_weighted_grades 一致：按加权平均分降序的名次。
+同分时名次按排序先后依次排列，因此 rank_for_score 返回同分者中最靠前的名次。
+"""
+
+import argparse
+import json
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+from fixed_point import to_hundredths
+from instrumentation import instrument, log, record_rows
+
+def _to_hundredths(score):
+    return to_hundredths(float(score))
+
+class RankIndex:
+    """按分数升序保存的排名索引"""
+
+    def __init__(self, scores):
+        """scores 为加权平均分的可迭代对象，顺序任意；缺失的分数会被忽略"""
+        self.scores = sorted(_to_hundredths(score) for score in scores
+                             if score is not None and score == score)
+
+    @classmethod
+    def from_hundredths(cls, sorted_scores):
+        """从已按升序排列的百分之一分整数列表构建（反序列化用）"""
+        index = cls([])
+        index.scores = list(sorted_scores)
+        return index
+
+    def __len__(self):
+        return len(self.scores)
+
+    def rank_for_score(self, score):
+        """该分数能取得的名次：严格高于它的人数 + 1"""
+        return len(self.scores) - bisect_right(self.scores, _to_hundredths(score)) + 1
+
+    def score_for_rank(self, rank):
+        """第 rank 名的加权平均分，名次超出范围时返回 None"""
+        if not 1 <= rank <= len(self.scores):
+            return None
+        return self.scores[len(self.scores) - rank] / 100
+
+    def percentile(self, score):
+        """严格低于该分数的学生所占百分比（“超过了百分之几的同学”）"""
+        if not self.scores:
+            return None
+        return bisect_left(self.scores, _to_hundredths(score)) / len(self.scores) * 100
+
+    def to_dict(self):
+        return {
+            "total": len(self.scores),
+            "scores": self.scores
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls.from_hundredths(data["scores"])
+
+@instrument
+def write_rank_index(scores, output_file):
+    """由加权平均分构建排名索引并保存为JSON"""
+    index = RankIndex(scores)
+    record_rows(rows_in=len(index), rows_out=len(index))
+
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(index.to_dict(), f, separators=(',', ':'))
+
+    log(f"✅ 排名索引已保存到: {output_file} ({len(index)} 个分数)")
+
+    return output_file
+
+def load_rank_index(index_file):
+    """读取 rank_index.json"""
+    with open(index_file, 'r', encoding='utf-8') as f:
+        return RankIndex.from_dict(json.load(f))
+
+def main():
+    parser = argparse.ArgumentParser(description="按分数查名次/百分位，或按名次查分数")
+    parser.add_argument("index_file", help="rank_index.json 路径")
+    parser.add_argument("--score", type=float, action="append", default=[], help="查询该分数的名次和百分位")
+    parser.add_argument("--rank", type=int, action="append", default=[], help="查询该名次的分数")
+    args = parser.parse_args()
+
+    index = load_rank_index(args.index_file)
+    for score in args.score:
+        print(f"📈 {score:.2f}分: 第{index.rank_for_score(score)}名/{len(index)}人，"
+              f"超过了 {index.percentile(score):.1f}% 的同学")
+    for rank in args.rank:
+        score = index.score_for_rank(rank)
+        if score is None:
+            print(f"❌ 名次超出范围: {rank}")
+        else:
+            print(f"🏅 第{rank}名: {score:.2f}分")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+两份学号-成绩记录的对账工具
+
+一次哈希连接完成比对（线性时间），供 compare_grades.py 和 compare_md_csv.py 共用。
+"""
+
+from collections import namedtuple
+
+# kind 取值: 'missing_left'（左侧缺失）、'missing_right'（右侧缺失）、'value_diff'（数值不一致）
+Mismatch = namedtuple('Mismatch', ['kind', 'student_id', 'left', 'right'])
+
+def index_records(records, key='学号', value='成绩'):
+    """
+    按学号建立哈希索引
+
+    返回 (index, duplicates)：index 为 {学号: 成绩}，重复学号保留首次出现的记录；
+    duplicates 为 {学号: 出现次数}，只包含出现多于一次的学号。
+    """
+    index = {}
+    counts = {}
+    for record in records:
+        student_id = str(record[key])
+        if student_id in index:
+            counts[student_id] = counts.get(student_id, 1) + 1
+        else:
+            index[student_id] = record[value]
+    return index, counts
+
+def _values_differ(left, right, tolerance, normalize=None):
+    """
+    normalize 不为空时比较两侧转换后的值（如 fixed_point.to_hundredths），任一侧无法转换时按字符串比较；
+    否则 tolerance 为 None 时按字符串比较，不为 None 时按数值比较
+    """
+    if normalize is not None:
+        left_key, right_key = normalize(left), normalize(right)
+        if left_key is None or right_key is None:
+            return str(left) != str(right)
+        return left_key != right_key
+    if tolerance is None:
+        return str(left) != str(right)
+    try:
+        return abs(float(left) - float(right)) > tolerance
+    except (TypeError, ValueError):
+        return str(left) != str(right)
+
+def reconcile(left_records, right_records, key='学号', value='成绩', tolerance=None, normalize=None):
+    """
+    比对两份记录
+
+    left_records / right_records 为记录字典的可迭代对象，key 为学号字段，value 为比较字段。
+    normalize 为成绩的转换函数时按转换结果精确比较（见 _values_differ）。
+    返回字典:
+        total             两侧学号并集的数量
+        matched           学号和成绩都一致的数量
+        mismatches        按学号排序的 Mismatch 列表
+        duplicates_left   左侧重复学号 {学号: 次数}
+        duplicates_right  右侧重复学号 {学号: 次数}
+    """
+    left, duplicates_left = index_records(left_records, key, value)
+    right, duplicates_right = index_records(right_records, key, value)
+
+    mismatches = []
+    matched = 0
+    for student_id, left_value in left.items():
+        if student_id not in right:
+            mismatches.append(Mismatch('missing_right', student_id, left_value, None))
+        elif _values_differ(left_value, right[student_id], tolerance, normalize):
+            mismatches.append(Mismatch('value_diff', student_id, left_value, right[student_id]))
+        else:
+            matched += 1
+    for student_id, right_value in right.items():
+        if student_id not in left:
+            mismatches.append(Mismatch('missing_left', student_id, None, right_value))
+
+    mismatches.sort(key=lambda mismatch: mismatch.student_id)
+
+    return {
+        'total': len(left) + sum(1 for student_id in right if student_id not in left),
+        'matched': matched,
+        'mismatches': mismatches,
+        'duplicates_left': duplicates_left,
+        'duplicates_right': duplicates_right
+    }
+
+def describe_mismatch(mismatch, left_name, right_name, value_label):
+    """将 Mismatch 转为与原比对脚本一致的中文描述"""
+    if mismatch.kind == 'missing_left':
+        return f"学号 {mismatch.student_id}: 在{left_name}中未找到"
+    if mismatch.kind == 'missing_right':
+        return f"学号 {mismatch.student_id}: 在{right_name}中未找到"
+    return (f"学号 {mismatch.student_id}: {value_label}不匹配 "
+            f"({left_name}: {mismatch.left}, {right_name}: {mismatch.right})")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+紧凑的学生成绩记录存储
+
+按列保存在定长类型数组中：学号为 int64，成绩为以百分之一分为单位的定点整数（int32），
+学生类型为 STUDENT_TYPES 中的下标。每名学生约占 40 字节，而每条字典记录要几百字节。
+需要时再按下标生成与 data.json 相同结构的记录字典，可直接写出 CSV / JSON / 二进制索引。
+
+少数无法按定长类型无损保存的值（如带字母或以0开头的学号、超过两位小数的成绩）
+原样保存在 overflow 字典中，数组中对应位置填入占位值，读出的记录与原值一致。
+"""
+
+import json
+import os
+from array import array
+from pathlib import Path
+
+from binary_index import MISSING_SCORE, STUDENT_TYPES
+
+# 值保存在 overflow 中时数组里的占位值
+OVERFLOW_ID = -1
+OVERFLOW_SCORE = MISSING_SCORE + 1
+
+def _pack_id(student_id):
+    """学号转换为整数，不能无损转换时返回 None"""
+    if student_id.isdigit() and (student_id == '0' or student_id[0] != '0') and int(student_id) < 2**63:
+        return int(student_id)
+    return None
+
+def _pack_score(score):
+    """成绩转换为百分之一分的整数，缺失为 MISSING_SCORE，不能无损转换时返回 None"""
+    if score is None or score != score:
+        return MISSING_SCORE
+    value = int(round(score * 100))
+    if value / 100 == score and OVERFLOW_SCORE < value < 2**31:
+        return value
+    return None
+
+class RecordStore:
+    """按列保存的学生成绩记录，记录顺序即排名表中的顺序"""
+
+    __slots__ = ('ids', 'ranks', 'year1', 'year2', 'weighted', 'types', 'totals', 'overflow')
+
+    def __init__(self):
+        self.ids = array('q')
+        self.ranks = array('q')
+        self.year1 = array('i')
+        self.year2 = array('i')
+        self.weighted = array('i')
+        self.types = array('b')
+        self.totals = array('q')
+        # (字段名, 位置) → 无法按定长类型保存的原值
+        self.overflow = {}
+
+    def _columns(self):
+        return (('学号', self.ids, _pack_id, OVERFLOW_ID),
+                ('大一成绩', self.year1, _pack_score, OVERFLOW_SCORE),
+                ('大二成绩', self.year2, _pack_score, OVERFLOW_SCORE),
+                ('加权平均分', self.weighted, _pack_score, OVERFLOW_SCORE))
+
+    def replace(self, position, student_id, rank, year1, year2, weighted, student_type, total):
+        """覆盖第 position 条记录，成绩为浮点数或 None"""
+        values = (str(student_id), year1, year2, weighted)
+        for (field, column, pack, placeholder), value in zip(self._columns(), values):
+            packed = pack(value)
+            if packed is None:
+                self.overflow[(field, position)] = value
+                packed = placeholder
+            else:
+                self.overflow.pop((field, position), None)
+            column[position] = packed
+        self.ranks[position] = int(rank)
+        self.types[position] = STUDENT_TYPES.index(student_type)
+        self.totals[position] = int(total)
+
+    def append(self, student_id, rank, year1, year2, weighted, student_type, total):
+        """追加一条记录"""
+        for column in (self.ids, self.ranks, self.year1, self.year2, self.weighted, self.types, self.totals):
+            column.append(0)
+        self.replace(len(self.ids) - 1, student_id, rank, year1, year2, weighted, student_type, total)
+
+    def student_id(self, position):
+        value = self.ids[position]
+        return self.overflow[('学号', position)] if value == OVERFLOW_ID else str(value)
+
+    def _score(self, field, column, position):
+        value = column[position]
+        if value == MISSING_SCORE:
+            return None
+        if value == OVERFLOW_SCORE:
+            return self.overflow[(field, position)]
+        return value / 100
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        由排名表的行（键同 grade_core.RESULT_COLUMNS 的字典）构建
+
+        与按学号建立字典相同，重复的学号只保留一条：位置取首次出现处，内容取最后一次出现的行。
+        旧版排名表没有'总人数'列，视为单一分区，总人数取记录数。
+        """
+        store = cls()
+        positions = {}
+        missing_total = False
+        for row in rows:
+            total = row.get('总人数')
+            if total in (None, ''):
+                total = -1
+                missing_total = True
+            values = (row['学号'], row['排名'], row['大一成绩'], row['大二成绩'], row['加权平均分'],
+                      row['学生类型'], total)
+            student_id = str(row['学号'])
+            if student_id in positions:
+                store.replace(positions[student_id], *values)
+            else:
+                positions[student_id] = len(store)
+                store.append(*values)
+        if missing_total:
+            store.totals = array('q', (len(store) if total < 0 else total for total in store.totals))
+        return store
+
+    def __len__(self):
+        return len(self.ids)
+
+    def record(self, position):
+        """第 position 条记录，结构与 data.json 中的记录相同"""
+        return {
+            "排名": self.ranks[position],
+            "学号": self.student_id(position),
+            "大一成绩": self._score('大一成绩', self.year1, position),
+            "大二成绩": self._score('大二成绩', self.year2, position),
+            "加权平均分": self._score('加权平均分', self.weighted, position),
+            "学生类型": STUDENT_TYPES[self.types[position]],
+            "总人数": self.totals[position]
+        }
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.record(position)
+
+    def student_ids(self):
+        return [self.student_id(position) for position in range(len(self))]
+
+    def scores(self, field='加权平均分'):
+        """某一成绩列的全部非缺失值（浮点数）"""
+        column = {'大一成绩': self.year1, '大二成绩': self.year2, '加权平均分': self.weighted}[field]
+        scores = (self._score(field, column, position) for position in range(len(self)))
+        return [score for score in scores if score is not None]
+
+    def count_type(self, student_type):
+        return self.types.count(STUDENT_TYPES.index(student_type))
+
+    def write_json(self, output_file, indent=2):
+        """
+        逐条写出 data.json（{学号: 记录}），内容与 json.dump 整个字典相同
+
+        先写临时文件再替换，查询服务热加载时不会读到写了一半的文件。
+        """
+        output_file = Path(output_file)
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        newline = '\n' + ' ' * indent
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            if not len(self):
+                f.write('{}')
+            else:
+                f.write('{')
+                for position, record in enumerate(self):
+                    body = json.dumps(record, ensure_ascii=False, indent=indent).replace('\n', newline)
+                    f.write(f"{',' if position else ''}{newline}{json.dumps(record['学号'])}: {body}")
+                f.write('\n}')
+        os.replace(tmp_file, output_file)
+        return output_file
+
+    def to_dict(self):
+        """全部记录的 {学号: 记录} 字典（供需要整体访问的场合）"""
+        return {record['学号']: record for record in self}
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 学生成绩库
+
+把各学年（或学期）的成绩增量载入一个本地 SQLite 数据库，学号交集、转入学生识别和学分加权排名
+都通过带索引的连接查询完成，新增一个学年只需载入该学年的文件，不必重新读取全部历史CSV。
+
+表结构:
+    students   每个学号一行，记录首次出现的学年
+    scores     每条成绩记录一行：学年、学期、学号、在来源文件中的顺序、成绩（百分之一分的整数）、原始文本；
+               主键 (学年, 学期, 学号, 顺序) 即连接时使用的索引
+    loads      每个学年/学期最近一次载入的来源文件及其内容哈希，文件未变化时跳过载入
+
+学年/学期以标签表示，如 '23-24'（整个学年）或 '24-25/1'（学期）。
+排名结果（含同分顺序）与 grade_core.rank_students 完全一致。
+
+用法:
+    python registry.py load --db grades.db 23-24 ../raw_data/final/23-24.csv --column 大一成绩 --no-header
+    python registry.py load --db grades.db 24-25 ../raw_data/final/24-25.csv --column 课程成绩
+    python registry.py transfers --db grades.db 24-25 --prior 23-24
+    python registry.py filter --db grades.db 23-24 --roster 24-25 --output 23-24_neo.csv
+    python registry.py rank --db grades.db --period 大一成绩=23-24 --period 大二成绩=24-25 --output 加权成绩排名.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import math
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from fixed_point import credit_units, to_hundredths, to_score
+from grade_core import YEAR_CREDITS, YEAR1_FIELDS, iter_rows, write_results
+from instrumentation import instrument, log, record_rows
+
+DEFAULT_DB = "grades.db"
+
+# 排名时成绩列对应的学年标签，顺序即加权累加顺序；最后一个学年的名单为排名名单
+YEAR_PERIODS = {
+    '大一成绩': '23-24',
+    '大二成绩': '24-25',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    student_id TEXT PRIMARY KEY,
+    first_period TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS scores (
+    year TEXT NOT NULL,
+    term TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    student_id TEXT NOT NULL REFERENCES students(student_id),
+    score INTEGER,
+    raw TEXT NOT NULL,
+    PRIMARY KEY (year, term, student_id, seq)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS loads (
+    year TEXT NOT NULL,
+    term TEXT NOT NULL,
+    source TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    loaded_at TEXT NOT NULL,
+    PRIMARY KEY (year, term)
+);
+"""
+
+def split_period(label):
+    """'24-25/1' → ('24-25', '1')，整个学年的学期为空字符串"""
+    year, _, term = label.partition('/')
+    return year, term
+
+def connect(db_file=DEFAULT_DB):
+    """打开（必要时创建）成绩库"""
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+@instrument
+def load_period(conn, label, path, score_column, fieldnames=None, force=False):
+    """
+    载入一个学年/学期的成绩文件，返回载入的记录数（文件未变化而跳过时返回 0）
+
+    fieldnames 用于无表头的CSV（如 23-24.csv 为 YEAR1_FIELDS）；含空字段的行被跳过（同 dropna）。
+    同一学年/学期重新载入时先删除旧记录，其他学年不受影响。
+    """
+    path = Path(path)
+    year, term = split_period(label)
+    sha256 = _file_hash(path)
+    previous = conn.execute("SELECT sha256 FROM loads WHERE year = ? AND term = ?", (year, term)).fetchone()
+    if previous and previous[0] == sha256 and not force:
+        log(f"⏭️  {label} 未变化，跳过载入: {path}")
+        return 0
+
+    rows = [(row['学号'], row[score_column]) for row in iter_rows(path, fieldnames=fieldnames)]
+    with conn:
+        conn.execute("DELETE FROM scores WHERE year = ? AND term = ?", (year, term))
+        conn.executemany("INSERT OR IGNORE INTO students (student_id, first_period) VALUES (?, ?)",
+                         ((student_id, label) for student_id, _ in rows))
+        conn.executemany(
+            "INSERT INTO scores (year, term, seq, student_id, score, raw) VALUES (?, ?, ?, ?, ?, ?)",
+            ((year, term, seq, student_id, to_hundredths(raw), raw) for seq, (student_id, raw) in enumerate(rows)))
+        conn.execute("INSERT OR REPLACE INTO loads VALUES (?, ?, ?, ?, ?, ?)",
+                     (year, term, str(path), sha256, len(rows), datetime.now().isoformat(timespec='seconds')))
+
+    record_rows(rows_in=len(rows), rows_out=len(rows))
+    log(f"✅ 已载入 {label}: {len(rows)} 条记录 ({path})")
+    return len(rows)
+
+def intersect(conn, left, right):
+    """两个学年/学期都有成绩的学号（升序）"""
+    return [student_id for (student_id,) in conn.execute(
+        """SELECT DISTINCT a.student_id FROM scores a
+           WHERE a.year = ? AND a.term = ?
+             AND EXISTS (SELECT 1 FROM scores b
+                         WHERE b.student_id = a.student_id AND b.year = ? AND b.term = ?)
+           ORDER BY a.student_id""", (*split_period(left), *split_period(right)))]
+
+def transfers(conn, roster, prior):
+    """roster 名单中在 prior 各学年/学期都没有成绩记录的学号（转入学生），按名单顺序"""
+    year, term = split_period(roster)
+    conditions = ' AND '.join("NOT EXISTS (SELECT 1 FROM scores p WHERE p.student_id = r.student_id "
+                              "AND p.year = ? AND p.term = ?)" for _ in prior)
+    params = [value for label in prior for value in split_period(label)]
+    return [student_id for (student_id,) in conn.execute(
+        f"""SELECT r.student_id FROM scores r
+            WHERE r.year = ? AND r.term = ?{' AND ' + conditions if prior else ''}
+            ORDER BY r.seq""", (year, term, *params))]
+
+def _format_raw(score, raw):
+    """导出成绩：能解析的按浮点数写出（与 pandas 写出的格式相同），否则保留原文"""
+    return raw if score is None else to_score(score)
+
+@instrument
+def export_period(conn, label, output_file, roster=None):
+    """
+    导出一个学年/学期的成绩为无表头CSV（学号,成绩，按学号排序）
+
+    roster 不为空时只导出在 roster 学年/学期中也有成绩的学号，即 filter_23_24 的学号交集筛选。
+    """
+    year, term = split_period(label)
+    query = "SELECT s.student_id, s.score, s.raw FROM scores s WHERE s.year = ? AND s.term = ?"
+    params = [year, term]
+    if roster:
+        query += (" AND EXISTS (SELECT 1 FROM scores r WHERE r.student_id = s.student_id"
+                  " AND r.year = ? AND r.term = ?)")
+        params += split_period(roster)
+    query += " ORDER BY s.student_id, s.seq"
+
+    count = 0
+    with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        for student_id, score, raw in conn.execute(query, params):
+            writer.writerow([student_id, _format_raw(score, raw)])
+            count += 1
+    record_rows(rows_in=count, rows_out=count)
+    log(f"✅ 已导出 {label} 的 {count} 条记录到: {output_file}")
+    return Path(output_file)
+
+def rank(conn, periods=YEAR_PERIODS, credits=YEAR_CREDITS):
+    """
+    按学分加权排名，逐条产出结果字典（键为 排名、学号、periods 中的成绩列、加权平均分、学生类型、总人数）
+
+    periods 为 {成绩列名: 学年/学期标签}，最后一项的名单为排名名单，其余学年左连接；
+    加权平均分由 SQLite 以整数计算，规则同 fixed_point.weighted_hundredths。
+    排序：加权平均分降序（无法计算的排最后），同分时完整学生在前、转入学生在后，
+    再按名单顺序和前面各学年的记录顺序，与 grade_core.rank_students 相同。
+    """
+    columns = list(periods)
+    labels = [periods[column] for column in columns]
+    units = [credit_units(credits[column]) for column in columns]
+    roster = len(columns) - 1
+
+    joins = []
+    params = []
+    for index, label in enumerate(labels[:-1]):
+        joins.append(f"LEFT JOIN scores p{index} ON p{index}.student_id = r.student_id "
+                     f"AND p{index}.year = ? AND p{index}.term = ?")
+        params += split_period(label)
+    aliases = [f"p{index}" for index in range(roster)] + ['r']
+    numerator = ' + '.join(f"COALESCE({alias}.score * {unit}, 0)" for alias, unit in zip(aliases, units))
+    denominator = ' + '.join(f"CASE WHEN {alias}.score IS NULL THEN 0 ELSE {unit} END"
+                             for alias, unit in zip(aliases, units))
+    transfer = ' OR '.join(f"{alias}.score IS NULL" for alias in aliases)
+
+    query = f"""
+        WITH joined AS (
+            SELECT r.student_id, r.seq AS roster_seq,
+                   {', '.join(f'{alias}.seq AS seq{i}, {alias}.score AS score{i}' for i, alias in enumerate(aliases))},
+                   {numerator} AS numerator, {denominator} AS denominator, ({transfer}) AS transfer
+            FROM scores r
+            {' '.join(joins)}
+            WHERE r.year = ? AND r.term = ?
+        )
+        SELECT student_id, {', '.join(f'score{i}' for i in range(len(aliases)))},
+               CASE WHEN denominator = 0 THEN NULL
+                    ELSE (2 * numerator + denominator) / (2 * denominator) END AS weighted,
+               transfer
+        FROM joined
+        ORDER BY weighted IS NULL, weighted DESC, transfer, roster_seq,
+                 {', '.join(f'seq{i}' for i in range(roster)) or 'roster_seq'}
+    """
+    params += split_period(labels[-1])
+    total = conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+
+    for position, row in enumerate(conn.execute(query, params), 1):
+        student_id, *scores, weighted, is_transfer = row
+        result = {'排名': position, '学号': student_id}
+        result.update((column, to_score(score)) for column, score in zip(columns, scores))
+        result['加权平均分'] = math.nan if weighted is None else to_score(weighted)
+        result['学生类型'] = '转入' if is_transfer else '完整'
+        result['总人数'] = total
+        yield result
+
+@instrument
+def rank_to_csv(conn, output_file="加权成绩排名.csv", simple_file="最终排名.csv", periods=YEAR_PERIODS,
+                credits=YEAR_CREDITS):
+    """排名并写出与 grade_core 相同格式的结果CSV（periods 须为默认的大一、大二两列）"""
+    result = write_results(rank(conn, periods, credits), output_file, simple_file)
+    log(f"✅ 完整结果已保存到: {output_file}")
+    log(f"✅ 简化排名已保存到: {simple_file}")
+    return result
+
+def sync_years(db_file, file_23_24, file_24_25):
+    """把两个学年的成绩文件同步到成绩库（内容未变化的跳过），返回数据库连接"""
+    conn = connect(db_file)
+    load_period(conn, YEAR_PERIODS['大一成绩'], file_23_24, '大一成绩', fieldnames=YEAR1_FIELDS)
+    load_period(conn, YEAR_PERIODS['大二成绩'], file_24_25, '课程成绩')
+    return conn
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite 学生成绩库：增量载入、交集筛选和加权排名")
+    parser.add_argument("--db", default=DEFAULT_DB, help="数据库文件")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load_parser = subparsers.add_parser("load", help="载入一个学年/学期的成绩")
+    load_parser.add_argument("period", help="学年/学期标签，如 23-24 或 24-25/1")
+    load_parser.add_argument("file", help="成绩CSV")
+    load_parser.add_argument("--column", default="课程成绩", help="成绩列名（无表头时为第二列的名称）")
+    load_parser.add_argument("--no-header", action="store_true", help="CSV没有表头（学号,成绩）")
+    load_parser.add_argument("--force", action="store_true", help="文件未变化也重新载入")
+
+    transfers_parser = subparsers.add_parser("transfers", help="列出转入学生")
+    transfers_parser.add_argument("period", help="名单所在的学年/学期")
+    transfers_parser.add_argument("--prior", action="append", default=[], help="之前的学年/学期（可重复）")
+
+    intersect_parser = subparsers.add_parser("intersect", help="列出两个学年/学期都有成绩的学号")
+    intersect_parser.add_argument("left")
+    intersect_parser.add_argument("right")
+
+    filter_parser = subparsers.add_parser("filter", help="导出某学年中在名单学年也有成绩的记录")
+    filter_parser.add_argument("period", help="要导出的学年/学期")
+    filter_parser.add_argument("--roster", default=None, help="名单学年/学期")
+    filter_parser.add_argument("--output", required=True, help="输出CSV（无表头）")
+
+    rank_parser = subparsers.add_parser("rank", help="学分加权排名")
+    rank_parser.add_argument("--period", action="append", default=[],
+                             help="成绩列=学年/学期，如 大一成绩=23-24（按顺序，最后一项为名单）")
+    rank_parser.add_argument("--credit", action="append", default=[],
+                             help="成绩列=学分，如 大一成绩=51.8（默认使用 YEAR_CREDITS）")
+    rank_parser.add_argument("--output", default="加权成绩排名.csv", help="完整结果输出路径")
+    rank_parser.add_argument("--simple", default="最终排名.csv", help="简化排名输出路径")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "load":
+        fieldnames = ['学号', args.column] if args.no_header else None
+        load_period(conn, args.period, args.file, args.column, fieldnames, args.force)
+    elif args.command == "transfers":
+        student_ids = transfers(conn, args.period, args.prior)
+        log(f"🔄 {len(student_ids)} 名转入学生")
+        for student_id in student_ids:
+            print(student_id)
+    elif args.command == "intersect":
+        student_ids = intersect(conn, args.left, args.right)
+        log(f"👥 {len(student_ids)} 个学号在两个学年/学期都有成绩")
+        for student_id in student_ids:
+            print(student_id)
+    elif args.command == "filter":
+        export_period(conn, args.period, args.output, args.roster)
+    else:
+        periods = dict(spec.split('=', 1) for spec in args.period) or YEAR_PERIODS
+        credits = {**YEAR_CREDITS, **{column: float(credit) for column, credit in
+                                      (spec.split('=', 1) for spec in args.credit)}}
+        rank_to_csv(conn, args.output, args.simple, periods, credits)
+    conn.close()
+
+if __name__ == "__main__":
+    main()
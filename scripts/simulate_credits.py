@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学分权重的假设分析（what-if）
+
+一次计算成百上千种学分配置下的加权平均分和排名：成绩矩阵（学生×学年）与学分矩阵
+（学年×方案）相乘得到全部方案的分数，再按列排序得到名次，不必每种配置重跑一次计算脚本。
+成绩和学分都转为整数（见 fixed_point）后相乘，结果与正式计算逐位一致，学分最多两位小数。
+方案按批处理，内存占用为 学生数×batch_size。
+
+输出两张表:
+    方案统计.csv   每个方案相对当前学分配置的名次变化（变化人数、平均/最大变动、前N名重合数）
+    学生统计.csv   每个学生在全部方案下的名次范围、均值和标准差
+
+只有学年成绩，按学期调整学分时请把同一学年各学期的学分相加后作为该学年的学分。
+
+用法:
+    python simulate_credits.py --grid 大一成绩=41.8:61.8:0.5 --grid 大二成绩=38.3:58.3:0.5
+    python simulate_credits.py --scenarios 方案.csv    # 列为 大一成绩,大二成绩（学分），可选 名称 列
+"""
+
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from calculate_weighted_grades import load_data, to_hundredths_array, weighted_hundredths_array
+from fixed_point import credit_units
+from grade_core import YEAR_CREDITS
+from instrumentation import instrument, log, record_rows
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_23_24_FILE = REPO_ROOT / "raw_data" / "final" / "23-24.csv"
+DEFAULT_24_25_FILE = REPO_ROOT / "raw_data" / "final" / "24-25.csv"
+
+def parse_grid(specs, credits=YEAR_CREDITS):
+    """
+    由网格描述生成方案表
+
+    specs 为 '列名=起始:结束:步长'（含结束值）或 '列名=a,b,c' 的列表，
+    未出现的成绩列使用 credits 中的学分；各列取值做笛卡尔积。
+    """
+    values = {column: [credit] for column, credit in credits.items()}
+    for spec in specs:
+        column, _, value_spec = spec.partition('=')
+        if column not in credits:
+            raise ValueError(f"未知的成绩列: {column}（可选: {', '.join(credits)}）")
+        if ':' in value_spec:
+            start, stop, step = (float(v) for v in value_spec.split(':'))
+            count = int(round((stop - start) / step)) + 1
+            values[column] = [round(start + i * step, 6) for i in range(count)]
+        else:
+            values[column] = [float(v) for v in value_spec.split(',')]
+
+    scenarios = pd.DataFrame(list(itertools.product(*values.values())), columns=list(values))
+    scenarios.insert(0, '名称', ['/'.join(f"{v:g}" for v in row) for row in scenarios.to_numpy()])
+    return scenarios
+
+def load_scenarios(path, credits=YEAR_CREDITS):
+    """读取方案CSV，缺少的成绩列使用 credits 中的学分"""
+    scenarios = pd.read_csv(path, encoding='utf-8-sig')
+    for column, credit in credits.items():
+        if column not in scenarios.columns:
+            scenarios[column] = credit
+    if '名称' not in scenarios.columns:
+        scenarios.insert(0, '名称', [f"方案{i + 1}" for i in range(len(scenarios))])
+    return scenarios
+
+def _rank_columns(weighted):
+    """对每一列（一个方案）按分数降序排名，同分保持行顺序，NaN 排最后"""
+    order = np.argsort(-weighted, axis=0, kind='stable')
+    ranks = np.empty(order.shape, dtype=np.int64)
+    np.put_along_axis(ranks, order, np.arange(1, len(weighted) + 1)[:, None], axis=0)
+    return ranks
+
+def _credit_units(credit_matrix):
+    """方案×成绩列 的学分矩阵转为 成绩列×方案 的整数矩阵"""
+    return np.array([[credit_units(credit) for credit in row] for row in credit_matrix.tolist()],
+                    dtype=np.int64).reshape(credit_matrix.shape).T
+
+@instrument
+def simulate(df_merged, scenarios, columns=tuple(YEAR_CREDITS), top_n=10, batch_size=1000):
+    """
+    计算全部方案下的名次并统计相对当前学分配置的变化
+
+    df_merged 每行一个学生，包含学号和 columns 中的成绩列（缺失为 NaN），
+    行顺序即同分时的先后顺序。返回 (方案统计DataFrame, 学生统计DataFrame)。
+    """
+    columns = list(columns)
+    scores = df_merged[columns].to_numpy(dtype=float)
+    present = np.isfinite(scores)
+    hundredths = to_hundredths_array(scores)
+    credit_matrix = scenarios[columns].to_numpy(dtype=float)
+    num_students = len(df_merged)
+
+    base_credits = np.array([[YEAR_CREDITS[column] for column in columns]])
+    base_rank = _rank_columns(weighted_hundredths_array(hundredths, present, _credit_units(base_credits)))[:, 0]
+    base_top = base_rank <= top_n
+
+    scenario_stats = []
+    rank_sum = np.zeros(num_students)
+    rank_sq_sum = np.zeros(num_students)
+    rank_min = np.full(num_students, num_students + 1)
+    rank_max = np.zeros(num_students, dtype=np.int64)
+
+    for start in range(0, len(scenarios), batch_size):
+        credits = _credit_units(credit_matrix[start:start + batch_size])
+        ranks = _rank_columns(weighted_hundredths_array(hundredths, present, credits))
+        delta = np.abs(ranks - base_rank[:, None])
+
+        scenario_stats.append(pd.DataFrame({
+            '名次变化人数': (delta > 0).sum(axis=0),
+            '平均名次变动': delta.mean(axis=0).round(3),
+            '最大名次变动': delta.max(axis=0),
+            f'前{top_n}名重合人数': ((ranks <= top_n) & base_top[:, None]).sum(axis=0),
+        }))
+
+        rank_sum += ranks.sum(axis=1)
+        rank_sq_sum += (ranks.astype(float) ** 2).sum(axis=1)
+        rank_min = np.minimum(rank_min, ranks.min(axis=1))
+        rank_max = np.maximum(rank_max, ranks.max(axis=1))
+
+    count = len(scenarios)
+    mean_rank = rank_sum / count
+    df_scenarios = pd.concat([scenarios.reset_index(drop=True)] + [pd.concat(scenario_stats, ignore_index=True)],
+                             axis=1)
+    df_students = pd.DataFrame({
+        '学号': df_merged['学号'].to_numpy(),
+        '当前名次': base_rank,
+        '最好名次': rank_min,
+        '最差名次': rank_max,
+        '名次极差': rank_max - rank_min,
+        '平均名次': mean_rank.round(2),
+        '名次标准差': np.sqrt(np.maximum(rank_sq_sum / count - mean_rank ** 2, 0)).round(3),
+    }).sort_values('当前名次').reset_index(drop=True)
+
+    record_rows(rows_in=num_students * count, rows_out=len(df_scenarios) + len(df_students))
+    return df_scenarios, df_students
+
+def merge_years(df_year1, df_year2):
+    """合并两个学年的成绩，行顺序与 calculate_weighted_grades 相同（完整学生在前、转入学生在后）"""
+    df_merged = pd.merge(df_year2[['学号', '大二成绩']], df_year1[['学号', '大一成绩']], on='学号', how='left')
+    complete = df_merged[list(YEAR_CREDITS)].notna().all(axis=1)
+    return pd.concat([df_merged[complete], df_merged[~complete]]).reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="批量模拟不同学分配置下的排名变化")
+    parser.add_argument("--year1", default=str(DEFAULT_23_24_FILE), help="23-24成绩CSV（无表头）")
+    parser.add_argument("--year2", default=str(DEFAULT_24_25_FILE), help="24-25成绩CSV")
+    parser.add_argument("--scenarios", default=None, help="方案CSV，每行一种学分配置")
+    parser.add_argument("--grid", action="append", default=[],
+                        help="网格方案，如 大一成绩=41.8:61.8:0.5（可重复指定）")
+    parser.add_argument("--top-n", type=int, default=10, help="统计前N名的重合情况")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批计算的方案数")
+    parser.add_argument("--output-dir", default="simulation", help="统计结果输出目录")
+    args = parser.parse_args()
+
+    if args.scenarios:
+        scenarios = load_scenarios(args.scenarios)
+    else:
+        # 默认在当前学分上下各浮动10学分
+        grid = args.grid or [f"{column}={credit - 10:g}:{credit + 10:g}:0.5"
+                             for column, credit in YEAR_CREDITS.items()]
+        scenarios = parse_grid(grid)
+
+    df_year1, df_year2 = load_data(args.year1, args.year2)
+    if df_year1 is None or df_year2 is None:
+        return
+    df_merged = merge_years(df_year1, df_year2)
+
+    log(f"\n🧪 正在模拟 {len(scenarios)} 种学分配置（{len(df_merged)} 名学生）...")
+    df_scenarios, df_students = simulate(df_merged, scenarios, top_n=args.top_n, batch_size=args.batch_size)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    df_scenarios.to_csv(output_dir / "方案统计.csv", index=False, encoding='utf-8-sig')
+    df_students.to_csv(output_dir / "学生统计.csv", index=False, encoding='utf-8-sig')
+
+    log(f"\n📊 名次变动最大的方案:")
+    for _, row in df_scenarios.nlargest(5, '平均名次变动').iterrows():
+        log(f"  {row['名称']}: {row['名次变化人数']} 人名次变化，平均变动 {row['平均名次变动']:.2f}，"
+            f"最大变动 {row['最大名次变动']}")
+    log(f"\n🎢 名次最不稳定的学生:")
+    for _, row in df_students.nlargest(5, '名次极差').iterrows():
+        log(f"  {row['学号']}: 当前第{row['当前名次']}名，范围 {row['最好名次']}-{row['最差名次']}")
+
+    log(f"\n✅ 结果已保存到: {output_dir / '方案统计.csv'}, {output_dir / '学生统计.csv'}")
+
+if __name__ == "__main__":
+    main()